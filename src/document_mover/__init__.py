@@ -2,6 +2,7 @@
 
 from document_mover.document_mover import main as document_mover_main
 from document_mover.pdf_merger import main as pdf_merger_main
-from .file_list import FileStats, FileListHandler
 
-__all__ = ["document_mover_main", "pdf_merger_main", "FileStats", "FileListHandler"]
+from .file_list import FileListHandler, FileStats
+
+__all__ = ["FileListHandler", "FileStats", "document_mover_main", "pdf_merger_main"]
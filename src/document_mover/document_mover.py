@@ -1,17 +1,18 @@
 #!/usr/bin/env python3
 
-import time
-import os
-import re
-import shutil
-from .file_list import FileStats, FileListHandler
 import argparse
-from pathlib import Path
+import errno
 import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
 
-from document_mover.pdf_merger import PDFMerger
-from .file_lock import FileLock
+from document_mover.pdf_merger import DEFAULT_BLANK_CACHE_PATH, PDFMerger
 
+from .file_list import FileListHandler, FileStats
+from .file_lock import FileLock
+from .file_ops import move_across_filesystems, prefetch_files, rename_noreplace, set_owner_and_mode
 
 # Default Configuration
 DEFAULT_SINGLE_DUAL_SIDE_PREFIX = "single-double-sided"
@@ -20,8 +21,9 @@ DEFAULT_DUAL_SIDE_PREFIX = "double-sided"
 DEFAULT_STABILITY_WAIT = 10  # seconds
 DEFAULT_MAX_AGE = 10  # minutes
 DEFAULT_LOCK_FILE = "/var/run/move-pdfs.lock"
-DEFAULT_USER_ID = os.getuid()  # Current user ID
-DEFAULT_GROUP_ID = os.getgid()  # Current group ID
+DEFAULT_STATE_FILE = None  # No state is kept between runs unless a path is given
+DEFAULT_USER_ID = None  # Current user ID, resolved when parsing arguments
+DEFAULT_GROUP_ID = None  # Current group ID, resolved when parsing arguments
 DEFAULT_FILE_TYPES = [
     ".pdf",
     ".jpg",
@@ -31,12 +33,41 @@ DEFAULT_FILE_TYPES = [
     ".tif",
 ]  # file extensions to process
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s] [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+# PDF merger of a merge worker process, created once per worker by _init_merge_worker
+_worker_pdf_merger: PDFMerger | None = None
+
+
+def _init_merge_worker(blank_cache_path: Path | None = None) -> None:
+    """
+    Create the PDF merger of a merge worker process.
+
+    Args:
+        blank_cache_path: Optional JSON file persisting blank page decisions, shared by all workers.
+    """
+    global _worker_pdf_merger
+    _worker_pdf_merger = PDFMerger(blank_cache_path=blank_cache_path)
+
+
+def _merge_pair(pdf1: Path, pdf2: Path, output_path: Path, delete_source: bool, remove_empty_pages: bool) -> bool:
+    """
+    Merge two PDF files in a worker process.
+
+    Module level so it can be pickled by the ProcessPoolExecutor.
+
+    Returns:
+        True if merge was successful, False otherwise
+    """
+    if _worker_pdf_merger is None:
+        _init_merge_worker()
+    assert _worker_pdf_merger is not None
+
+    return _worker_pdf_merger.merge(
+        pdf1=pdf1,
+        pdf2=pdf2,
+        output_path=output_path,
+        delete_source=delete_source,
+        remove_empty_pages=remove_empty_pages,
+    )
 
 
 class ScanFileProcessor:
@@ -55,6 +86,8 @@ class ScanFileProcessor:
         max_age: int,
         file_types: list,
         dry_run: bool = False,
+        state_file: str | None = None,
+        blank_cache: str | Path | None = None,
     ):
         """
         Initialize the file processor.
@@ -69,6 +102,9 @@ class ScanFileProcessor:
             max_age: Maximum file age in minutes before forcing move
             file_types: List of file extensions to process
             dry_run: If True, perform dry run without moving files
+            state_file: Optional path of a file keeping the directory state between runs, so an unchanged
+                directory is processed without stability wait
+            blank_cache: Optional path of a JSON file persisting blank page decisions between runs
         """
 
         self.logger = logging.getLogger(__name__)
@@ -81,9 +117,23 @@ class ScanFileProcessor:
         self.group_id = group_id
         self.stability_wait = stability_wait
         self.max_age_seconds = max_age * 60
-        self.file_types = [ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in file_types]
+        self.file_types = frozenset(ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in file_types)
         self.dry_run = dry_run
-        self.file_list = FileListHandler(self.source_dir, self.file_types)
+        self.state_file = Path(state_file) if state_file is not None else None
+        tag_patterns = {}
+        if self.dual_side_prefix_pattern is not None:
+            tag_patterns["dual-side"] = self.dual_side_prefix_pattern
+        if self.single_dual_side_prefix_pattern is not None:
+            tag_patterns["single-dual-side"] = self.single_dual_side_prefix_pattern
+        self.file_list = FileListHandler(self.source_dir, self.file_types, tag_patterns=tag_patterns)
+        self.blank_cache_path = Path(blank_cache) if blank_cache is not None else None
+        self.pdf_merger = PDFMerger(blank_cache_path=self.blank_cache_path)
+
+        # Same filesystem allows atomic renames instead of copying
+        try:
+            self._same_fs = os.stat(self.source_dir).st_dev == os.stat(self.dest_dir).st_dev
+        except OSError:
+            self._same_fs = False
 
     def move_file(self, file_stat: FileStats) -> bool:
         """
@@ -95,41 +145,59 @@ class ScanFileProcessor:
         Returns:
             True if file was processed successfully, False otherwise
         """
-        filename = file_stat.path.name
+        filename = file_stat.name
 
         try:
-            # Check if file still exists
-            if not file_stat.path.exists():
-                self.logger.debug(f"File no longer exists: {filename}")
-                return False
-
             # Determine destination path
             dest_path = self.dest_dir / filename
 
-            # Check if destination already exists
-            if dest_path.exists():
-                self.logger.warning(f"Destination file already exists, skipping: {filename}")
-                # Remove source file if it's identical
-                if not self.dry_run:
-                    try:
-                        file_stat.path.unlink()
-                        self.logger.info(f"Removed duplicate source file: {filename}")
-                    except Exception:
-                        pass
-                return False
-
             if self.dry_run:
-                self.logger.info(f"[DRY-RUN] Would move file: {file_stat.path} -> {dest_path}")
+                if not file_stat.refresh():
+                    self.logger.debug(f"File no longer exists: {filename}")
+                    return False
+
+                if dest_path.exists():
+                    self.logger.warning(f"Destination file already exists, skipping: {filename}")
+                    return False
+
+                self.logger.info(f"[DRY-RUN] Would move file: {file_stat.path_str} -> {dest_path}")
                 self.logger.info(
                     f"[DRY-RUN] Would set ownership to {self.user_id}:{self.group_id} and permissions to 0660"
                 )
                 return True
 
-            shutil.move(str(file_stat.path), str(dest_path))
+            renamed = False
+            try:
+                if self._same_fs:
+                    try:
+                        # The kernel refuses an existing destination, no separate existence check needed
+                        rename_noreplace(file_stat.path_str, dest_path)
+                        renamed = True
+                    except OSError as e:
+                        # Bind mounts or a subvolume mounted twice share st_dev but refuse renames between them
+                        if e.errno != errno.EXDEV:
+                            raise
+                        self.logger.debug(f"Rename across mount points not possible, copying: {filename}")
+                if not renamed:
+                    move_across_filesystems(file_stat.path_str, dest_path)
+            except FileExistsError:
+                self.logger.warning(f"Destination file already exists, skipping: {filename}")
+                # Remove source file if it's identical
+                try:
+                    os.unlink(file_stat.path_str)
+                    self.logger.info(f"Removed duplicate source file: {filename}")
+                except Exception:
+                    pass
+                return False
 
-            # Change ownership and permissions
-            os.chown(dest_path, self.user_id, self.group_id)
-            os.chmod(dest_path, 0o660)
+            # Change ownership and permissions, a rename keeps the inode so the scanned stat is still valid
+            set_owner_and_mode(
+                dest_path,
+                self.user_id,
+                self.group_id,
+                0o660,
+                known_stat=file_stat.stat_result if renamed else None,
+            )
 
             self.logger.info(f"Successfully processed file: {filename} -> {self.dest_dir}")
             return True
@@ -168,8 +236,7 @@ class ScanFileProcessor:
             return True
 
         try:
-            pdf_merger = PDFMerger()
-            merge_success = pdf_merger.merge(
+            merge_success = self.pdf_merger.merge(
                 pdf1=pdf1,
                 pdf2=pdf2,
                 output_path=output_path,
@@ -181,13 +248,7 @@ class ScanFileProcessor:
                 self.logger.error(f"Failed to merge PDF files: {pdf1} + {pdf2}")
                 return False
 
-            time.sleep(1)
-
-            # Set ownership and permissions for merged file
-            os.chown(output_path, self.user_id, self.group_id)
-            os.chmod(output_path, 0o660)
-
-            self.logger.info(f"Successfully merged dual-side files into: {output_path}")
+            self.finalize_merged_file(output_path)
 
         except Exception as e:
             self.logger.error(f"Error merging PDF files {pdf1} + {pdf2}: {e}")
@@ -195,6 +256,67 @@ class ScanFileProcessor:
 
         return True
 
+    def finalize_merged_file(self, output_path: Path) -> None:
+        """
+        Set ownership and permissions of a freshly merged PDF file.
+
+        Args:
+            output_path: Path of the merged PDF file
+        """
+        # PDFMerger.merge() has closed and fsynced the output file when it returns, no need to wait
+        # Set ownership and permissions for merged file
+        set_owner_and_mode(output_path, self.user_id, self.group_id, 0o660)
+
+        self.logger.info(f"Successfully merged dual-side files into: {output_path}")
+
+    def merge_pdf_pairs(self, pairs: list[tuple[Path, Path, Path]]) -> int:
+        """
+        Merge independent PDF pairs in parallel worker processes.
+
+        Source files are deleted and empty pages removed for each pair.
+
+        Args:
+            pairs: List of (pdf1, pdf2, output_path) tuples
+
+        Returns:
+            int: Number of successfully merged pairs
+        """
+        # Start readahead of all source files, so reading them overlaps with merging earlier pairs
+        prefetch_files([pdf for pdf1, pdf2, _ in pairs for pdf in (pdf1, pdf2)])
+
+        if len(pairs) == 1:
+            pdf1, pdf2, output_path = pairs[0]
+            return int(
+                self.merge_pdf_files(
+                    pdf1=pdf1, pdf2=pdf2, output_path=output_path, delete_source=True, remove_empty_pages=True
+                )
+            )
+
+        success_count = 0
+        with ProcessPoolExecutor(
+            max_workers=min(len(pairs), os.cpu_count() or 1),
+            initializer=_init_merge_worker,
+            initargs=(self.blank_cache_path,),
+        ) as executor:
+            futures = {
+                executor.submit(_merge_pair, pdf1, pdf2, output_path, True, True): (pdf1, pdf2, output_path)
+                for pdf1, pdf2, output_path in pairs
+            }
+
+            for future in as_completed(futures):
+                pdf1, pdf2, output_path = futures[future]
+                try:
+                    if not future.result():
+                        self.logger.error(f"Failed to merge PDF files: {pdf1} + {pdf2}")
+                        continue
+
+                    self.finalize_merged_file(output_path)
+                    success_count += 1
+                except Exception as e:
+                    self.logger.error(f"Error merging PDF files {pdf1} + {pdf2}: {e}")
+
+        return success_count
+
     def handle_dual_side_files(
         self, files: list[FileStats], consecutive_pairwise: bool = False, outside_pairing: bool = False
     ) -> int:
@@ -213,6 +335,13 @@ class ScanFileProcessor:
             return 0
 
         success_count = 0
+        if not files:
+            return success_count
+
+        if len(files) == 1:
+            self.logger.info(f"Only one dual-side file found ({files[0].name}), waiting for its pair")
+            return success_count
+
         if len(files) % 2 != 0:
             self.logger.error(f"Odd number of dual-side files detected ({len(files)}), cannot perform merge")
             return success_count
@@ -225,21 +354,20 @@ class ScanFileProcessor:
             self.logger.error("Either consecutive_pairwise or outside_pairing must be True.")
             return success_count
 
+        # Pairs are independent, collect them first and merge them in parallel
+        pairs: list[tuple[Path, Path, Path]] = []
         for i, j in file_range:
             # Process file1 and file2 as a pair
             file1 = files[i]
             file2 = files[j]
 
-            file1_match = re.search(r"\d+", file1.path.name)
-            file2_match = re.search(r"\d+", file2.path.name)
+            file1_number = file1.number
+            file2_number = file2.number
 
-            if not file1_match or not file2_match:
-                self.logger.warning(f"Could not extract numbers from {file1.path.name} or {file2.path.name}")
+            if file1_number is None or file2_number is None:
+                self.logger.warning(f"Could not extract numbers from {file1.name} or {file2.name}")
                 continue
 
-            file1_number = int(file1_match.group(0))
-            file2_number = int(file2_match.group(0))
-
             if file1_number < file2_number:
                 # Merge PDF of file1 and file2
                 merged_filename = f"dual-side_{file1_number}_{file2_number}_merged.pdf"
@@ -247,19 +375,15 @@ class ScanFileProcessor:
 
                 if self.dry_run:
                     self.logger.info(
-                        f"[DRY-RUN] Would merge dual-side files: {file1.path.name} + {file2.path.name} -> {merged_filename}"
+                        f"[DRY-RUN] Would merge dual-side files: {file1.name} + {file2.name} -> {merged_filename}"
                     )
                     success_count += 1
                     continue
                 else:
-                    if self.merge_pdf_files(
-                        pdf1=file1.path,
-                        pdf2=file2.path,
-                        output_path=merged_filepath,
-                        delete_source=True,
-                        remove_empty_pages=True,
-                    ):
-                        success_count += 1
+                    pairs.append((file1.path, file2.path, merged_filepath))
+
+        if pairs:
+            success_count += self.merge_pdf_pairs(pairs)
 
         return success_count
 
@@ -282,40 +406,73 @@ class ScanFileProcessor:
         if self.dry_run:
             self.logger.info("DRY-RUN MODE: No files will be moved")
 
-        self.logger.info(f"Processing file types: {', '.join(self.file_types)}")
+        self.logger.info(f"Processing file types: {', '.join(sorted(self.file_types))}")
         self.logger.info(f"Default destination: {self.dest_dir}")
 
-        self.file_list.parse_files(self.stability_wait, only_stable_files=False)
+        # Start watching before the scan so no close event between scan and wait is missed
+        watcher = self.file_list.open_watcher()
+        try:
+            self.file_list.snapshot_sizes()
 
-        if not self.file_list.get_number_of_files():
-            self.logger.info("No files to process")
-            return 0
+            if not self.file_list.get_number_of_files():
+                self.logger.info("No files to process")
+                return 0
 
-        self.logger.info(f"Found {self.file_list.get_number_of_files()} file(s) to process")
+            self.logger.info(f"Found {self.file_list.get_number_of_files()} file(s) to process")
 
-        # Check if prefix given for dual-side files
-        if self.dual_side_prefix_pattern is not None:
-            self.file_list.add_tag_to_files(self.dual_side_prefix_pattern, "dual-side")
+            has_tagged_files = self.file_list.has_tagged_files()
+            if self.state_file is not None:
+                self.file_list.load_state(self.state_file)
 
-        if self.single_dual_side_prefix_pattern is not None:
-            self.file_list.add_tag_to_files(self.single_dual_side_prefix_pattern, "single-dual-side")
+            # An unchanged directory was already found stable by the previous run, no wait needed
+            if not self.file_list.unchanged_since_state():
+                if has_tagged_files:
+                    # One wait covers both the file and the directory stability check
+                    time.sleep(max(self.stability_wait, self.stability_wait_single_dual_side))
+                    self.file_list.finalize_after_wait(max_age=self.max_age_seconds)
+                else:
+                    self.file_list.update_file_stats(self.stability_wait, watcher=watcher, max_age=self.max_age_seconds)
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+        success_count = self.process_files(has_tagged_files)
 
+        if self.state_file is not None and not self.dry_run:
+            try:
+                self.file_list.save_state(self.state_file)
+            except OSError as e:
+                self.logger.warning(f"Could not save state file {self.state_file}: {e}")
+
+        return success_count
+
+    def process_files(self, has_tagged_files: bool) -> int:
+        """
+        Move the stable untagged files and merge the dual-side files if the directory is stable.
+
+        Args:
+            has_tagged_files: Whether the scan found tagged files.
+
+        Returns:
+            int: Number of successfully processed files
+        """
         success_count = 0
+        untagged_files, file_list_dual, file_list_single_dual = self.file_list.classify(
+            dual_tag="dual-side", single_dual_tag="single-dual-side"
+        )
 
         # handle files with no tag first -> normal files
-        for file in self.file_list.get_untagged_files(sort_key_regex=r"(\d+)"):
-            if self.move_file(file):
-                success_count += 1
+        # Moves are independent and I/O bound, so they overlap in threads
+        if untagged_files:
+            max_workers = min(len(untagged_files), 32, (os.cpu_count() or 4) * 2)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                success_count += sum(executor.map(self.move_file, untagged_files))
 
-        if self.file_list.is_directory_stable(self.stability_wait_single_dual_side):
-            self.logger.info("Source directory is stable for single dual-side files.")
+        if not has_tagged_files:
+            return success_count
 
-            file_list_single_dual = self.file_list.get_files_with_tag(
-                "single-dual-side", file_types=[".pdf"], sort_key_regex=r"(\d+)"
-            )
-            file_list_dual = self.file_list.get_files_with_tag(
-                "dual-side", file_types=[".pdf"], sort_key_regex=r"(\d+)"
-            )
+        if self.file_list.directory_stable:
+            self.logger.info("Source directory is stable for single dual-side files.")
 
             if file_list_single_dual:
                 self.logger.info(
@@ -369,14 +526,14 @@ def parse_arguments():
     parser.add_argument(
         "--user-id",
         type=int,
-        default=DEFAULT_USER_ID,
+        default=DEFAULT_USER_ID if DEFAULT_USER_ID is not None else os.getuid(),
         help="User ID for file ownership",
     )
 
     parser.add_argument(
         "--group-id",
         type=int,
-        default=DEFAULT_GROUP_ID,
+        default=DEFAULT_GROUP_ID if DEFAULT_GROUP_ID is not None else os.getgid(),
         help="Group ID for file ownership",
     )
 
@@ -407,6 +564,21 @@ def parse_arguments():
         help="Lock file path to prevent concurrent execution",
     )
 
+    parser.add_argument(
+        "--state-file",
+        default=DEFAULT_STATE_FILE,
+        help="File keeping the directory state between runs, skips the stability wait if nothing changed",
+    )
+
+    parser.add_argument(
+        "--blank-cache",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_BLANK_CACHE_PATH,
+        default=None,
+        help=f"Persist blank page decisions in a JSON file, {DEFAULT_BLANK_CACHE_PATH} if no path is given",
+    )
+
     parser.add_argument(
         "--file-types",
         nargs="+",
@@ -429,6 +601,13 @@ def main():
     """Main function to process all files in source directory."""
     args = parse_arguments()
 
+    # Setup logging, only when run as a program so importing the package leaves the root logger alone
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
     # Set logging level
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -446,6 +625,8 @@ def main():
         stability_wait=args.stability_wait,
         file_types=args.file_types,
         dry_run=args.dry_run,
+        state_file=args.state_file,
+        blank_cache=args.blank_cache,
     )
 
     # Run the processor
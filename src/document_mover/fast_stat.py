@@ -0,0 +1,197 @@
+"""Lightweight stat helpers for stability checks."""
+
+import ctypes
+import errno
+import functools
+import os
+from pathlib import Path
+
+try:
+    import liburing  # type: ignore[import-untyped]
+except ImportError:  # optional, only used to batch stat calls
+    liburing = None
+
+AT_FDCWD = -100
+AT_STATX_SYNC_AS_STAT = 0x0000
+AT_STATX_DONT_SYNC = 0x4000
+STATX_SIZE = 0x200
+URING_BATCH_SIZE = 256
+
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_int64),
+        ("tv_nsec", ctypes.c_uint32),
+        ("__reserved", ctypes.c_int32),
+    ]
+
+
+class _Statx(ctypes.Structure):
+    """Mirror of the kernel's struct statx (256 bytes)."""
+
+    _fields_ = [
+        ("stx_mask", ctypes.c_uint32),
+        ("stx_blksize", ctypes.c_uint32),
+        ("stx_attributes", ctypes.c_uint64),
+        ("stx_nlink", ctypes.c_uint32),
+        ("stx_uid", ctypes.c_uint32),
+        ("stx_gid", ctypes.c_uint32),
+        ("stx_mode", ctypes.c_uint16),
+        ("__spare0", ctypes.c_uint16),
+        ("stx_ino", ctypes.c_uint64),
+        ("stx_size", ctypes.c_uint64),
+        ("stx_blocks", ctypes.c_uint64),
+        ("stx_attributes_mask", ctypes.c_uint64),
+        ("stx_atime", _StatxTimestamp),
+        ("stx_btime", _StatxTimestamp),
+        ("stx_ctime", _StatxTimestamp),
+        ("stx_mtime", _StatxTimestamp),
+        ("stx_rdev_major", ctypes.c_uint32),
+        ("stx_rdev_minor", ctypes.c_uint32),
+        ("stx_dev_major", ctypes.c_uint32),
+        ("stx_dev_minor", ctypes.c_uint32),
+        ("__spare2", ctypes.c_uint64 * 14),
+    ]
+
+
+@functools.cache
+def _libc_statx():
+    """
+    Look up statx() in the C library once.
+
+    Returns:
+        The ctypes function, or None if the platform does not provide it.
+    """
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        statx = libc.statx
+    except (OSError, AttributeError):
+        return None
+
+    statx.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(_Statx)]
+    statx.restype = ctypes.c_int
+    return statx
+
+
+def stat_size(path: str | Path, sync: bool = True) -> int:
+    """
+    Get the size of a file.
+
+    Uses statx(STATX_SIZE) on Linux, which only fetches the size. Falls back to os.stat() elsewhere.
+
+    With sync=False, AT_STATX_DONT_SYNC lets network filesystems (NFS, CIFS) answer from their
+    attribute cache without asking the server. That cached size can stay unchanged while a client
+    is still writing, so it must only be used for a first snapshot, never for the comparison
+    which declares a file stable.
+
+    Args:
+        path: Path of the file to query.
+        sync: If False, allow a possibly outdated size from the attribute cache.
+
+    Returns:
+        Size of the file in bytes.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    statx = _libc_statx()
+    if statx is None:
+        return os.stat(path).st_size
+
+    buf = _Statx()
+    flags = AT_STATX_SYNC_AS_STAT if sync else AT_STATX_DONT_SYNC
+    if statx(AT_FDCWD, os.fsencode(path), flags, STATX_SIZE, ctypes.byref(buf)) != 0:
+        err = ctypes.get_errno()
+        if err == errno.ENOSYS:
+            # Kernel older than 4.11
+            return os.stat(path).st_size
+        raise OSError(err, os.strerror(err), str(path))
+
+    if not buf.stx_mask & STATX_SIZE:
+        return os.stat(path).st_size
+
+    return buf.stx_size
+
+
+def _stat_sizes_uring(paths: list[str | Path], sync: bool) -> list[int | None]:
+    """
+    Get the sizes of many files with batched statx requests through io_uring.
+
+    Args:
+        paths: Paths of the files to query.
+        sync: If False, allow possibly outdated sizes from the attribute cache, see stat_size().
+
+    Returns:
+        Sizes in bytes in the order of paths, None for files which do not exist.
+    """
+    sizes: list[int | None] = [None] * len(paths)
+    flags = AT_STATX_SYNC_AS_STAT if sync else AT_STATX_DONT_SYNC
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    liburing.io_uring_queue_init(min(len(paths), URING_BATCH_SIZE), ring)
+
+    try:
+        for start in range(0, len(paths), URING_BATCH_SIZE):
+            batch = range(start, min(start + URING_BATCH_SIZE, len(paths)))
+            buffers = {}
+            for index in batch:
+                buffers[index] = liburing.Statx()
+                sqe = liburing.io_uring_get_sqe(ring)
+                liburing.io_uring_prep_statx(sqe, buffers[index], os.fsdecode(paths[index]), flags, STATX_SIZE)
+                liburing.io_uring_sqe_set_data64(sqe, index)
+
+            liburing.io_uring_submit_and_wait(ring, len(batch))
+
+            reaped = 0
+            while reaped < len(batch):
+                liburing.io_uring_wait_cqe(ring, cqe)
+                ready = liburing.io_uring_cq_ready(ring)
+                for i in range(ready):
+                    entry = cqe[i]
+                    index = entry.user_data
+                    try:
+                        # Reading the result raises the errno of a failed request as OSError
+                        _ = entry.res
+                    except FileNotFoundError:
+                        continue
+                    sizes[index] = buffers[index].size
+                liburing.io_uring_cq_advance(ring, ready)
+                reaped += ready
+    finally:
+        liburing.io_uring_queue_exit(ring)
+
+    return sizes
+
+
+def stat_sizes(paths: list[str | Path], sync: bool = True) -> list[int | None]:
+    """
+    Get the sizes of many files at once.
+
+    Submits all requests in one io_uring batch when the optional liburing package is installed and
+    the kernel supports it, otherwise queries the files one by one with stat_size().
+
+    Args:
+        paths: Paths of the files to query.
+        sync: If False, allow possibly outdated sizes from the attribute cache, see stat_size().
+
+    Returns:
+        Sizes in bytes in the order of paths, None for files which do not exist.
+    """
+    if not paths:
+        return []
+
+    if liburing is not None:
+        try:
+            return _stat_sizes_uring(paths, sync)
+        except OSError:
+            # io_uring disabled or not supported by the kernel
+            pass
+
+    sizes: list[int | None] = []
+    for path in paths:
+        try:
+            sizes.append(stat_size(path, sync))
+        except FileNotFoundError:
+            sizes.append(None)
+
+    return sizes
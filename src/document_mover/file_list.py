@@ -1,36 +1,106 @@
+import json
 import logging
-from pathlib import Path
-import time
+import os
 import re
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="[%(asctime)s] [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
+from .fast_stat import stat_size, stat_sizes
+from .inotify_stability import (
+    IN_CLOSE_WRITE,
+    IN_MODIFY,
+    IN_MOVED_TO,
+    InotifyWatcher,
+    StabilityWatcher,
+    inotify_available,
 )
 
+# First run of digits in a filename, used for pairing and sorting scans
+NUMBER_PATTERN = re.compile(r"\d+")
 
-class FileStats:
-    """File statistics for tracking file state during processing."""
+# Characters with a special meaning in regular expressions
+_REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+# Tags are stored as bits of an int, names map to their bit
+TAG_DUAL = 1
+TAG_SINGLE_DUAL = 2
+_TAG_BITS = {"dual-side": TAG_DUAL, "single-dual-side": TAG_SINGLE_DUAL}
+
+
+def tag_bit(tag: str) -> int:
+    """
+    Get the bit of a tag name, assigning the next free bit to a new name.
+
+    Only called when a tag is assigned, lookups use _TAG_BITS directly so they never register a name.
+
+    Args:
+        tag: The tag name.
 
-    def __init__(self, path: Path, initial_size: int, age: float, final_size: int, is_stable: bool):
+    Returns:
+        The bit representing the tag.
+    """
+    bit = _TAG_BITS.get(tag)
+    if bit is None:
+        bit = 1 << len(_TAG_BITS)
+        _TAG_BITS[tag] = bit
+
+    return bit
+
+
+@dataclass(slots=True)
+class FileStats:
+    """
+    File statistics for tracking file state during processing.
+
+    Slotted, so the many instances of a large scan carry no per-instance __dict__. The path is kept as
+    the string from the directory scan; the Path object is only built on first access of path.
+
+    Attributes:
+        path_str: Path to the file as string.
+        name: Name of the file.
+        initial_size: Initial size of the file in bytes.
+        age: Age of the file in seconds.
+        final_size: Final size of the file in bytes after stability check.
+        is_stable: Whether the file is stable (not being written to).
+        number: First number in the filename, None if the name contains no digits.
+        tags: Bitmask of the tags assigned to the file, 0 if untagged.
+        stat_result: Last stat result of the file, from the directory scan or refresh().
+    """
+
+    path_str: str
+    name: str
+    initial_size: int
+    age: float
+    final_size: int
+    is_stable: bool
+    number: int | None = None
+    tags: int = 0
+    stat_result: os.stat_result | None = field(default=None, repr=False)
+    _path: Path | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def path(self) -> Path:
+        """Path to the file, constructed on first access."""
+        if self._path is None:
+            self._path = Path(self.path_str)
+        return self._path
+
+    def refresh(self) -> bool:
         """
-        Initialize FileStats with file information.
+        Stat the file again and cache the result.
 
-        Args:
-            path: Path to the file.
-            initial_size: Initial size of the file in bytes.
-            age: Age of the file in seconds.
-            final_size: Final size of the file in bytes after stability check.
-            is_stable: Whether the file is stable (not being written to).
+        Returns:
+            True if the file exists, False otherwise.
         """
-        self.path = path
-        self.initial_size = initial_size
-        self.age = age
-        self.final_size = final_size
-        self.is_stable = is_stable
-        self.tags: list[str] = []
+        try:
+            self.stat_result = os.stat(self.path_str)
+        except FileNotFoundError:
+            self.stat_result = None
+            return False
+
+        return True
 
     def add_tag(self, tag: str) -> None:
         """
@@ -39,7 +109,28 @@ class FileStats:
         Args:
             tag: The tag name to add to the file.
         """
-        self.tags.append(tag)
+        self.tags |= tag_bit(tag)
+
+    def add_tag_bit(self, bit: int) -> None:
+        """
+        Add a tag to the file by its bit.
+
+        Args:
+            bit: The tag bit, e.g. TAG_DUAL.
+        """
+        self.tags |= bit
+
+    def has_tag_bit(self, bit: int) -> bool:
+        """
+        Check if the file has a tag by its bit.
+
+        Args:
+            bit: The tag bit, e.g. TAG_DUAL.
+
+        Returns:
+            True if the file has the tag, False otherwise.
+        """
+        return bool(self.tags & bit)
 
     def has_tag(self, tag: str) -> bool:
         """
@@ -52,27 +143,76 @@ class FileStats:
             True if the file has the tag, False otherwise.
         """
         if tag == "":
-            return len(self.tags) == 0
+            return self.tags == 0
+
+        # A query never registers a tag, an unknown name is simply not set
+        return bool(self.tags & _TAG_BITS.get(tag, 0))
+
+
+def compile_matcher(pattern: str) -> Callable[[str], object]:
+    """
+    Build a function checking if a filename contains a match of a pattern.
 
-        return tag in self.tags
+    Patterns without regex metacharacters, like the default prefixes, are matched with a plain substring
+    test, which is much cheaper than running the regex engine. Both variants behave like re.search().
+
+    Args:
+        pattern: Regular expression pattern or literal text.
+
+    Returns:
+        Function taking a filename and returning a truthy value if it matches.
+    """
+    if _REGEX_METACHARACTERS.isdisjoint(pattern):
+        return lambda name: pattern in name
+
+    return re.compile(pattern).search
 
 
 class FileListHandler:
     """Handles file collection, stability checking, and tagging."""
 
-    def __init__(self, path: Path, include_file_types: list[str]) -> None:
+    def __init__(
+        self,
+        path: Path,
+        include_file_types: Iterable[str],
+        tag_patterns: dict[str, str] | None = None,
+        stability_watcher: StabilityWatcher | None = None,
+    ) -> None:
         """
         Initialize FileListHandler.
 
         Args:
             path: Directory path to scan for files.
-            include_file_types: List of file extensions to include (e.g., ['.pdf', '.jpg']).
+            include_file_types: File extensions to include (e.g., ['.pdf', '.jpg']).
+            tag_patterns: Optional mapping of tag name to regex pattern. Matching files are tagged
+                while they are parsed, so no separate tagging pass is needed.
+            stability_watcher: Optional long-lived watcher on the directory. If given, stability is decided
+                by the watcher's quiet period and update_file_stats() does not wait at all.
         """
         self.path = path
-        self.include_file_types = include_file_types
+        self.include_file_types = frozenset(ext.lower() for ext in include_file_types)
+        self._tag_matchers = [
+            (tag, tag_bit(tag), compile_matcher(pattern)) for tag, pattern in (tag_patterns or {}).items()
+        ]
         self.files: dict[str, FileStats] = {}
+        self.directory_initial_size = 0
+        self.directory_stable = False
+        self.stability_watcher = stability_watcher
+        self._previous_state: tuple[int, dict[str, int]] | None = None
         self.logger = logging.getLogger(__name__)
 
+    def has_included_type(self, filename: str) -> bool:
+        """
+        Check if a filename has one of the included file extensions.
+
+        Args:
+            filename: Name of the file to check.
+
+        Returns:
+            True if the extension is included (case-insensitive), False otherwise.
+        """
+        return os.path.splitext(filename)[1].lower() in self.include_file_types
+
     def remove_unstable_files(self) -> None:
         """
         Remove all unstable files from the file list.
@@ -88,15 +228,22 @@ class FileListHandler:
         """
         Check if the directory is stable (no new files being written).
 
+        Returns right away without waiting if the directory is unchanged since the state loaded with
+        load_state().
+
         Args:
             stability_wait: Time in seconds to wait before checking stability.
 
         Returns:
             True if directory is stable, False otherwise.
         """
-        initial_size = self.path.stat().st_size
+        if self.unchanged_since_state():
+            return True
+
+        # The first size may come from the attribute cache, the comparison after the wait must not
+        initial_size = stat_size(self.path, sync=False)
         time.sleep(stability_wait)
-        final_size = self.path.stat().st_size
+        final_size = stat_size(self.path)
         if initial_size == final_size and initial_size > 0:
             if self.file_list_changed():
                 self.logger.info("Directory contents changed during stability wait.")
@@ -111,72 +258,343 @@ class FileListHandler:
         """
         Check if the file list in the directory has changed.
 
-        Compares current files with tracked files by name and size.
+        Compares current files with tracked files by name and size and stops at the first difference.
 
         Returns:
             True if file list has changed, False otherwise.
         """
-        current_files = {
-            file.name: file.stat().st_size
-            for file in self.path.iterdir()
-            if file.is_file() and any(file.name.lower().endswith(ext) for ext in self.include_file_types)
-        }
-
-        if len(current_files) != len(self.files):
-            return True
-
-        for filename, stats in self.files.items():
-            if filename not in current_files or current_files[filename] != stats.final_size:
-                return True
-
-        return False
-
-    def parse_files(self, stability_wait: int, only_stable_files: bool) -> None:
+        seen = 0
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if not self.has_included_type(entry.name) or not entry.is_file(follow_symlinks=False):
+                    continue
+
+                seen += 1
+                stats = self.files.get(entry.name)
+                if stats is None or seen > len(self.files):
+                    return True
+
+                try:
+                    if entry.stat().st_size != stats.final_size:
+                        return True
+                except FileNotFoundError:
+                    return True
+
+        # Every current file is tracked, so the lists only differ if a tracked file disappeared
+        return seen != len(self.files)
+
+    def parse_files(self, stability_wait: int, only_stable_files: bool, max_age: float | None = None) -> None:
         """
         Parse and collect files from the directory.
 
-        Collects file statistics, checks stability, and optionally removes unstable files.
+        Collects file statistics, applies the tag patterns, checks stability, and optionally removes
+        unstable files.
 
         Args:
             stability_wait: Time in seconds to wait before checking file stability.
             only_stable_files: If True, remove unstable files from the list after parsing.
+            max_age: Optional age in seconds after which a file is stable without a stability check.
         """
-        self.logger.info(f"Parsing files in directory: {self.path}")
-
-        for file in self.path.iterdir():
-            if file.is_file() and any(file.name.lower().endswith(ext) for ext in self.include_file_types):
-                self.files[file.name] = FileStats(
-                    path=file,
-                    initial_size=file.stat().st_size,
-                    age=time.time() - file.stat().st_mtime,
-                    final_size=0,
-                    is_stable=False,
-                )
+        # Start watching before the scan so no close event between scan and wait is missed
+        watcher = self.open_watcher()
 
-        self.update_file_stats(stability_wait=stability_wait)
+        try:
+            self.snapshot_sizes()
+            self.update_file_stats(stability_wait=stability_wait, watcher=watcher, max_age=max_age)
+        finally:
+            if watcher is not None:
+                watcher.close()
 
         if only_stable_files:
             self.remove_unstable_files()
 
-    def update_file_stats(self, stability_wait: int) -> None:
+    def snapshot_sizes(self) -> None:
+        """
+        Collect files from the directory and record their sizes and the directory size.
+
+        Applies the tag patterns while collecting. Does not wait, the stability of the files and of the
+        directory is evaluated by finalize_after_wait() or update_file_stats().
+        """
+        self.logger.info(f"Parsing files in directory: {self.path}")
+
+        # One timestamp for the whole scan, file ages are relative to the start of parsing
+        now = time.time()
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if self.has_included_type(entry.name) and entry.is_file(follow_symlinks=False):
+                    # DirEntry caches the stat result, size and mtime come from a single syscall
+                    entry_stat = entry.stat()
+                    number_match = NUMBER_PATTERN.search(entry.name)
+                    self.files[entry.name] = FileStats(
+                        path_str=entry.path,
+                        name=entry.name,
+                        initial_size=entry_stat.st_size,
+                        age=now - entry_stat.st_mtime,
+                        final_size=0,
+                        is_stable=False,
+                        number=int(number_match.group()) if number_match else None,
+                        stat_result=entry_stat,
+                    )
+                    for tag_name, bit, matches in self._tag_matchers:
+                        if matches(entry.name):
+                            self.logger.debug(f"Tagging file {entry.name} with tag '{tag_name}'")
+                            self.files[entry.name].add_tag_bit(bit)
+
+        self.directory_initial_size = stat_size(self.path, sync=False)
+
+    def finalize_after_wait(self, max_age: float | None = None) -> None:
+        """
+        Evaluate file and directory stability after the caller waited since snapshot_sizes().
+
+        Sets is_stable of every file like update_file_stats() and sets directory_stable to True if the
+        directory size did not change and no files were added, removed or resized.
+
+        Args:
+            max_age: Optional age in seconds after which a file is stable without a stability check.
+        """
+        self._check_file_sizes(self._pending_files(max_age), closed=set())
+
+        final_size = stat_size(self.path)
+        self.directory_stable = False
+        if self.directory_initial_size == final_size and final_size > 0:
+            if self.file_list_changed():
+                self.logger.info("Directory contents changed during stability wait.")
+            else:
+                self.logger.info("Directory is stable.")
+                self.directory_stable = True
+
+    def load_state(self, state_file: Path) -> None:
+        """
+        Load the directory state saved by a previous run with save_state().
+
+        A missing or unreadable state file is ignored, the next stability check then waits as usual.
+
+        Args:
+            state_file: Path of the state file.
+        """
+        self._previous_state = None
+        try:
+            with open(state_file, encoding="utf-8") as f:
+                state = json.load(f)
+            self._previous_state = (int(state["dir_mtime_ns"]), dict(state["files"]))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable state file {state_file}: {e}")
+
+    def save_state(self, state_file: Path) -> None:
+        """
+        Save the directory modification time and the sizes of the stable files left in the directory.
+
+        Files which are not known to be stable are left out, so they make the next run wait as usual.
+
+        Args:
+            state_file: Path of the state file.
+        """
+        # Take the mtime before scanning, a change during the scan then shows up as changed next run
+        dir_mtime_ns = os.stat(self.path).st_mtime_ns
+        files = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                stats = self.files.get(entry.name)
+                if (
+                    stats is not None
+                    and stats.is_stable
+                    and entry.is_file(follow_symlinks=False)
+                    and entry.stat().st_size == stats.final_size
+                ):
+                    files[entry.name] = stats.final_size
+
+        # Write to a temporary file and rename it, so a crash never leaves a truncated state file
+        tmp_file = state_file.with_name(f".{state_file.name}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"dir_mtime_ns": dir_mtime_ns, "files": files}, f)
+        os.replace(tmp_file, state_file)
+
+    def unchanged_since_state(self) -> bool:
+        """
+        Check if the directory is unchanged since the state loaded with load_state().
+
+        If so, all files were already stable in the previous run, so every file is marked stable and
+        directory_stable is set without waiting.
+
+        Returns:
+            True if the directory mtime and all file names and sizes match the loaded state, False otherwise.
+        """
+        if self._previous_state is None or not self.files:
+            return False
+
+        previous_mtime_ns, previous_sizes = self._previous_state
+        if os.stat(self.path).st_mtime_ns != previous_mtime_ns or len(previous_sizes) != len(self.files):
+            return False
+
+        for filename, stats in self.files.items():
+            if previous_sizes.get(filename) != stats.initial_size:
+                return False
+
+        for stats in self.files.values():
+            stats.final_size = stats.initial_size
+            stats.is_stable = stats.initial_size > 0
+        self.directory_stable = True
+        self.logger.info("Directory unchanged since last run, skipping stability wait.")
+        return True
+
+    def open_watcher(self) -> InotifyWatcher | None:
+        """
+        Open an inotify watcher on the directory if possible.
+
+        Returns:
+            The watcher, or None if inotify is unavailable or a stability watcher is used instead.
+        """
+        if self.stability_watcher is not None or not inotify_available():
+            return None
+
+        try:
+            return InotifyWatcher(self.path)
+        except OSError as e:
+            self.logger.debug(f"Inotify not usable for {self.path}, falling back to polling: {e}")
+            return None
+
+    def wait_for_close_write(
+        self, watcher: InotifyWatcher, stability_wait: int, files: dict[str, FileStats] | None = None
+    ) -> set[str]:
+        """
+        Wait until all tracked files have been closed after writing, at most stability_wait seconds.
+
+        Args:
+            watcher: Inotify watcher on the directory.
+            stability_wait: Maximum time in seconds to wait.
+            files: Files to wait for, defaults to all tracked files.
+
+        Returns:
+            Names of the files which were closed after their last write.
+        """
+        if files is None:
+            files = self.files
+
+        closed: set[str] = set()
+        deadline = time.monotonic() + stability_wait
+
+        while len(closed) < len(files):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            for mask, name in watcher.read_events(remaining):
+                if name not in files:
+                    continue
+                if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    closed.add(name)
+                elif mask & IN_MODIFY:
+                    closed.discard(name)
+
+        return closed
+
+    def update_file_stats(
+        self, stability_wait: int, watcher: InotifyWatcher | None = None, max_age: float | None = None
+    ) -> None:
         """
         Update file statistics by checking final sizes after wait period.
 
-        Waits for the specified time and then checks if file sizes have changed.
+        Without a watcher, waits for the specified time and then checks if file sizes have changed.
+        With a watcher, the wait ends as soon as every file was closed after writing; those files are
+        stable right away, the others fall back to the size comparison.
         Sets is_stable to True if size remained constant and is greater than 0.
+        Files older than max_age are stable without waiting; if all files are that old, no wait happens.
+        With a stability_watcher on the handler, no wait happens either; a file is stable if the watcher
+        saw no write activity on it for its quiet period.
 
         Args:
             stability_wait: Time in seconds to wait before checking file stability.
+            watcher: Optional inotify watcher on the directory, started before the files were parsed.
+            max_age: Optional age in seconds after which a file is considered stable.
         """
-        time.sleep(stability_wait)
+        pending = self._pending_files(max_age)
+        if not pending:
+            return
+
+        if self.stability_watcher is not None:
+            self._check_quiet_files(pending, self.stability_watcher)
+            return
+
+        if watcher is not None:
+            closed = self.wait_for_close_write(watcher, stability_wait, pending)
+        else:
+            closed = set()
+            time.sleep(stability_wait)
+
+        self._check_file_sizes(pending, closed)
+
+    def _pending_files(self, max_age: float | None) -> dict[str, FileStats]:
+        """
+        Decide the stability of files older than max_age without a check and return the others.
+
+        An old file is stable unless it is empty, like an aborted upload which will never be completed.
+
+        Args:
+            max_age: Optional age in seconds after which a file is considered stable.
+
+        Returns:
+            Files which still need a stability check.
+        """
+        if max_age is None:
+            return self.files
+
+        pending = {}
         for filename, stats in self.files.items():
-            filepath = stats.path
-            if filepath.exists():
-                new_size = filepath.stat().st_size
-                stats.final_size = new_size
-                stats.is_stable = stats.initial_size == new_size and stats.initial_size > 0
+            if stats.age > max_age:
+                stats.final_size = stats.initial_size
+                stats.is_stable = stats.initial_size > 0
             else:
+                pending[filename] = stats
+
+        return pending
+
+    def _check_file_sizes(self, files: dict[str, FileStats], closed: set[str]) -> None:
+        """
+        Stat files again and set their final size and stability.
+
+        Args:
+            files: Files to check.
+            closed: Names of files known to be closed after writing, stable if not empty.
+        """
+        new_sizes = stat_sizes([stats.path_str for stats in files.values()])
+        for (filename, stats), new_size in zip(files.items(), new_sizes):
+            if new_size is None:
                 stats.is_stable = False
+                continue
+
+            stats.final_size = new_size
+            if filename in closed:
+                stats.is_stable = new_size > 0
+            else:
+                stats.is_stable = stats.initial_size == new_size and stats.initial_size > 0
+
+    def _check_quiet_files(self, files: dict[str, FileStats], stability_watcher: StabilityWatcher) -> None:
+        """
+        Set final size and stability of files from the stability watcher without waiting.
+
+        Args:
+            files: Files to check.
+            stability_watcher: Long-lived watcher deciding whether a file has been quiet long enough.
+        """
+        new_sizes = stat_sizes([stats.path_str for stats in files.values()])
+        for (filename, stats), new_size in zip(files.items(), new_sizes):
+            if new_size is None:
+                stats.is_stable = False
+                continue
+
+            stats.final_size = new_size
+            stats.is_stable = stability_watcher.is_stable(filename) and stats.initial_size > 0
+
+    def has_tagged_files(self) -> bool:
+        """
+        Check if any files in the list have a tag.
+
+        Returns:
+            True if at least one file is tagged, False otherwise.
+        """
+        return any(stats.tags for stats in self.files.values())
 
     def has_unstable_files(self) -> bool:
         """
@@ -197,9 +615,9 @@ class FileListHandler:
             regex_search_pattern: Regular expression pattern to match against filenames.
             tag_name: The tag name to add to matching files.
         """
-        pattern = re.compile(regex_search_pattern)
+        matches = compile_matcher(regex_search_pattern)
         for filename, stats in self.files.items():
-            if pattern.search(filename):
+            if matches(filename):
                 self.logger.debug(f"Tagging file {filename} with tag '{tag_name}'")
                 stats.add_tag(tag_name)
 
@@ -209,6 +627,7 @@ class FileListHandler:
         file_types: list[str] | None = None,
         only_stable: bool = True,
         sort_key_regex: str | None = None,
+        sort_by_number: bool = False,
     ) -> list[FileStats]:
         """
         Get all files with a specific tag.
@@ -218,25 +637,32 @@ class FileListHandler:
             file_types: Optional list of file extensions to further filter by.
             only_stable: If True, only return stable files. Defaults to True.
             sort_key_regex: Regular expression pattern to sort the files by.
+            sort_by_number: If True, sort numerically by the number extracted from the filename.
+                Files without a number come first. Takes precedence over sort_key_regex.
 
         Returns:
             List of FileStats objects matching the criteria.
         """
-        file_list = [stats for stats in self.files.values() if stats.has_tag(tag_name)]
+        if tag_name == "":
+            file_list = [stats for stats in self.files.values() if stats.tags == 0]
+        else:
+            bit = _TAG_BITS.get(tag_name, 0)
+            file_list = [stats for stats in self.files.values() if stats.tags & bit]
 
         if only_stable:
             file_list = [stats for stats in file_list if stats.is_stable]
 
         if file_types:
-            file_list = [
-                stats for stats in file_list if any(stats.path.name.lower().endswith(ext) for ext in file_types)
-            ]
+            extensions = tuple(ext.lower() for ext in file_types)
+            file_list = [stats for stats in file_list if stats.name.lower().endswith(extensions)]
 
-        if sort_key_regex is not None:
+        if sort_by_number:
+            file_list.sort(key=lambda stats: stats.number if stats.number is not None else -1)
+        elif sort_key_regex is not None:
             pattern = re.compile(sort_key_regex)
 
             def get_sort_key(stats: FileStats) -> str:
-                match = pattern.search(stats.path.name)
+                match = pattern.search(stats.name)
                 if match:
                     return match.group()
                 return ""
@@ -245,6 +671,54 @@ class FileListHandler:
 
         return file_list
 
+    def classify(
+        self,
+        dual_tag: str,
+        single_dual_tag: str,
+        only_stable: bool = True,
+        tagged_file_types: Iterable[str] = (".pdf",),
+    ) -> tuple[list[FileStats], list[FileStats], list[FileStats]]:
+        """
+        Split the files into untagged, dual-side and single dual-side files in one pass.
+
+        A file carrying both tags counts as single dual-side only, since that pattern is the more
+        specific one. Tagged files with an extension outside tagged_file_types are left out. Each list
+        is sorted by the number in the filename.
+
+        Args:
+            dual_tag: Tag name of dual-side files.
+            single_dual_tag: Tag name of single dual-side files.
+            only_stable: If True, only stable files are classified. Defaults to True.
+            tagged_file_types: File extensions which tagged files must have.
+
+        Returns:
+            Tuple of (untagged, dual-side, single dual-side) file lists.
+        """
+        extensions = tuple(ext.lower() for ext in tagged_file_types)
+        dual_bit = _TAG_BITS.get(dual_tag, 0)
+        single_dual_bit = _TAG_BITS.get(single_dual_tag, 0)
+        untagged: list[FileStats] = []
+        dual: list[FileStats] = []
+        single_dual: list[FileStats] = []
+
+        for stats in self.files.values():
+            if only_stable and not stats.is_stable:
+                continue
+
+            if not stats.tags:
+                untagged.append(stats)
+            elif not stats.name.lower().endswith(extensions):
+                continue
+            elif stats.tags & single_dual_bit:
+                single_dual.append(stats)
+            elif stats.tags & dual_bit:
+                dual.append(stats)
+
+        for file_list in (untagged, dual, single_dual):
+            file_list.sort(key=lambda stats: stats.number if stats.number is not None else -1)
+
+        return untagged, dual, single_dual
+
     def get_number_of_files(self) -> int:
         """
         Get the total number of files in the list.
@@ -255,7 +729,11 @@ class FileListHandler:
         return len(self.files)
 
     def get_untagged_files(
-        self, only_stable: bool = True, file_types: list[str] | None = None, sort_key_regex: str | None = None
+        self,
+        only_stable: bool = True,
+        file_types: list[str] | None = None,
+        sort_key_regex: str | None = None,
+        sort_by_number: bool = False,
     ) -> list[FileStats]:
         """
         Get all untagged files.
@@ -264,10 +742,15 @@ class FileListHandler:
             only_stable: If True, only return stable files. Defaults to True.
             file_types: Optional list of file extensions to further filter by.
             sort_key_regex: Regular expression pattern to sort the files by.
+            sort_by_number: If True, sort numerically by the number extracted from the filename.
 
         Returns:
             List of untagged FileStats objects matching the criteria.
         """
         return self.get_files_with_tag(
-            tag_name="", file_types=file_types, only_stable=only_stable, sort_key_regex=sort_key_regex
+            tag_name="",
+            file_types=file_types,
+            only_stable=only_stable,
+            sort_key_regex=sort_key_regex,
+            sort_by_number=sort_by_number,
         )
@@ -1,35 +1,40 @@
 import fcntl
+import logging
 import os
 import sys
-import logging
 from pathlib import Path
 
+
 class FileLock:
     """Context manager for file-based locking to prevent concurrent execution."""
-    
+
     def __init__(self, lock_file: Path):
         self.lock_file = lock_file
         self.lock_fd = None
         self.logger = logging.getLogger(__name__)
-    
+
     def __enter__(self):
+        # Open without truncating, the PID of a running instance stays in the file until we own the lock
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
         try:
-            self.lock_fd = open(self.lock_file, 'w')
-            fcntl.flock(self.lock_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            self.lock_fd.write(str(os.getpid()))
-            self.lock_fd.flush()
-            self.logger.info(f"Acquired lock: {self.lock_file}")
-            return self
-        except IOError:
-            self.logger.warning("Another instance is already running, exiting")
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            previous_pid = os.read(fd, 32).decode(errors="replace").strip()
+            os.close(fd)
+            self.logger.warning("Another instance is already running (pid %s), exiting", previous_pid)
             sys.exit(0)
-    
+
+        # Raw fd and a single unbuffered write, the PID stamp is only informational
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self.lock_fd = fd
+        self.logger.info("Acquired lock: %s", self.lock_file)
+        return self
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.lock_fd:
-            fcntl.flock(self.lock_fd.fileno(), fcntl.LOCK_UN)
-            self.lock_fd.close()
-            try:
-                os.remove(self.lock_file)
-            except OSError:
-                pass
-            self.logger.info(f"Released lock: {self.lock_file}")
\ No newline at end of file
+        if self.lock_fd is not None:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+            os.close(self.lock_fd)
+            self.lock_fd = None
+            # The lock file is kept, removing it races with another instance which just opened it
+            self.logger.info("Released lock: %s", self.lock_file)
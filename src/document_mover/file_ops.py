@@ -0,0 +1,254 @@
+"""File operation helpers for moving processed files."""
+
+import ctypes
+import errno
+import functools
+import os
+import shutil
+import stat
+from pathlib import Path
+from typing import BinaryIO
+
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# copy_file_range() errors meaning "not possible here", which fall back to a userspace copy
+_COPY_FILE_RANGE_UNSUPPORTED = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF)
+
+
+@functools.cache
+def _libc_renameat2():
+    """
+    Look up renameat2() in the C library once.
+
+    Returns:
+        The ctypes function, or None if the platform does not provide it.
+    """
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        return None
+
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    renameat2.restype = ctypes.c_int
+    return renameat2
+
+
+def rename_noreplace(src: str | Path, dst: str | Path) -> None:
+    """
+    Atomically rename a file without overwriting an existing destination.
+
+    Uses renameat2(RENAME_NOREPLACE) on Linux, so the kernel rejects an existing destination within the
+    same syscall. Falls back to an existence check followed by os.rename() if the platform or filesystem
+    does not support the flag. Source and destination must be on the same filesystem.
+
+    Args:
+        src: Path of the file to rename.
+        dst: New path of the file.
+
+    Raises:
+        FileExistsError: If the destination already exists.
+        FileNotFoundError: If the source does not exist.
+    """
+    renameat2 = _libc_renameat2()
+    if renameat2 is not None:
+        if renameat2(AT_FDCWD, os.fsencode(src), AT_FDCWD, os.fsencode(dst), RENAME_NOREPLACE) == 0:
+            return
+
+        err = ctypes.get_errno()
+        # ENOSYS: kernel without renameat2, EINVAL: filesystem without RENAME_NOREPLACE support
+        if err not in (errno.ENOSYS, errno.EINVAL):
+            raise OSError(err, os.strerror(err), str(src), None, str(dst))
+
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst))
+
+    os.rename(src, dst)
+
+
+def set_owner_and_mode(
+    path: str | Path, user_id: int, group_id: int, mode: int = 0o660, known_stat: os.stat_result | None = None
+) -> None:
+    """
+    Set ownership and permissions of a file, skipping calls which would not change anything.
+
+    Both changes go through one opened file descriptor, so the path is only resolved once.
+
+    Args:
+        path: Path of the file.
+        user_id: User ID for file ownership.
+        group_id: Group ID for file ownership.
+        mode: Permission bits to set.
+        known_stat: Optional stat result of the file which is still valid, e.g. from before a rename.
+            If it already matches, no syscall is made at all.
+    """
+    if (
+        known_stat is not None
+        and known_stat.st_uid == user_id
+        and known_stat.st_gid == group_id
+        and stat.S_IMODE(known_stat.st_mode) == mode
+    ):
+        return
+
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    except PermissionError:
+        # File is not readable for us, fall back to path based calls
+        os.chown(path, user_id, group_id)
+        os.chmod(path, mode)
+        return
+
+    try:
+        file_stat = os.fstat(fd)
+        if file_stat.st_uid != user_id or file_stat.st_gid != group_id:
+            os.fchown(fd, user_id, group_id)
+        if stat.S_IMODE(file_stat.st_mode) != mode:
+            os.fchmod(fd, mode)
+    finally:
+        os.close(fd)
+
+
+def _copy_file_data(src_file: BinaryIO, dst_file: BinaryIO) -> None:
+    """
+    Copy the contents of one file into another.
+
+    Uses copy_file_range() so the data stays in the kernel (and CoW filesystems can reflink it).
+    Falls back to a userspace copy from the current offsets if the kernel or filesystem refuses.
+
+    Args:
+        src_file: Source file opened for binary reading.
+        dst_file: Destination file opened for binary writing.
+    """
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            while copy_file_range(src_file.fileno(), dst_file.fileno(), COPY_CHUNK_SIZE):
+                pass
+            return
+        except OSError as e:
+            if e.errno not in _COPY_FILE_RANGE_UNSUPPORTED:
+                raise
+
+    shutil.copyfileobj(src_file, dst_file, COPY_CHUNK_SIZE)
+
+
+def _open_temporary_file(directory: Path) -> tuple[int, Path | None]:
+    """
+    Create an unnamed temporary file in a directory, or a hidden named one as fallback.
+
+    Args:
+        directory: Directory which will contain the final file.
+
+    Returns:
+        Tuple of the file descriptor opened for writing and the temporary path, None if the file is
+        unnamed (O_TMPFILE).
+    """
+    o_tmpfile = getattr(os, "O_TMPFILE", None)
+    if o_tmpfile is not None and os.path.isdir("/proc/self/fd"):
+        try:
+            return os.open(directory, o_tmpfile | os.O_WRONLY, 0o600), None
+        except OSError as e:
+            # Filesystem without O_TMPFILE support
+            if e.errno not in (errno.EOPNOTSUPP, errno.EISDIR, errno.EINVAL):
+                raise
+
+    tmp_path = directory / f".{os.getpid()}.{os.urandom(4).hex()}.tmp"
+    return os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), tmp_path
+
+
+def _publish_temporary_file(fd: int, tmp_path: Path | None, dst: Path) -> None:
+    """
+    Give a completely written temporary file its final name without replacing an existing file.
+
+    Args:
+        fd: File descriptor of the temporary file.
+        tmp_path: Path of a named temporary file, None for an unnamed one.
+        dst: Final path of the file.
+
+    Raises:
+        FileExistsError: If the destination already exists.
+    """
+    if tmp_path is None:
+        # With a dir_fd os.link() uses linkat(AT_SYMLINK_FOLLOW), which resolves the magic /proc link
+        proc_fd = os.open("/proc/self/fd", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.link(str(fd), dst, src_dir_fd=proc_fd, follow_symlinks=True)
+        finally:
+            os.close(proc_fd)
+        return
+
+    try:
+        # link() never replaces an existing destination
+        os.link(tmp_path, dst)
+    except FileExistsError:
+        raise
+    except OSError:
+        # Filesystem without hard links
+        rename_noreplace(tmp_path, dst)
+    else:
+        os.unlink(tmp_path)
+
+
+def move_across_filesystems(src: str | Path, dst: str | Path) -> None:
+    """
+    Move a file to another filesystem without overwriting an existing destination.
+
+    The data is copied in kernel space where possible into a temporary file in the destination directory,
+    which only gets its final name once it is complete, so no partial file is ever visible under the
+    destination name. Timestamps and permission bits are preserved and the source is removed afterwards.
+
+    Args:
+        src: Path of the file to move.
+        dst: Destination path of the file.
+
+    Raises:
+        FileExistsError: If the destination already exists.
+        FileNotFoundError: If the source does not exist.
+    """
+    dst = Path(dst)
+    with open(src, "rb") as src_file:
+        src_stat = os.fstat(src_file.fileno())
+        fd, tmp_path = _open_temporary_file(dst.parent)
+        try:
+            with open(fd, "wb", closefd=False) as dst_file:
+                _copy_file_data(src_file, dst_file)
+            os.utime(fd, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+            os.fchmod(fd, stat.S_IMODE(src_stat.st_mode))
+            _publish_temporary_file(fd, tmp_path, dst)
+        except BaseException:
+            if tmp_path is not None and os.path.lexists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        finally:
+            os.close(fd)
+
+    os.unlink(src)
+
+
+def prefetch_files(paths: list[str | Path]) -> None:
+    """
+    Ask the kernel to start reading files into the page cache.
+
+    Readahead runs asynchronously, so later reads of the files overlap with other work. Errors are
+    ignored, this is only a hint.
+
+    Args:
+        paths: Paths of the files which will be read soon.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
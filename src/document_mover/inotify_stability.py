@@ -0,0 +1,199 @@
+"""Inotify based write tracking and quiescence detection for stability checks."""
+
+import ctypes
+import functools
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+@functools.cache
+def _libc():
+    """
+    Load the C library once and check it provides inotify.
+
+    Returns:
+        The ctypes library handle, or None if inotify is not available.
+    """
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+
+    return libc
+
+
+def inotify_available() -> bool:
+    """
+    Check if inotify can be used on this platform.
+
+    Returns:
+        True if inotify is available, False otherwise.
+    """
+    return _libc() is not None
+
+
+class InotifyWatcher:
+    """Watches a directory for write activity on its files."""
+
+    def __init__(self, path: Path, mask: int = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO) -> None:
+        """
+        Start watching a directory.
+
+        Args:
+            path: Directory to watch.
+            mask: Inotify event mask to subscribe to.
+
+        Raises:
+            OSError: If inotify is unavailable or the watch cannot be added.
+        """
+        libc = _libc()
+        if libc is None:
+            raise OSError("inotify is not available on this platform")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err), str(path))
+
+    def read_events(self, timeout: float) -> list[tuple[int, str]]:
+        """
+        Wait for events and return them.
+
+        Args:
+            timeout: Maximum time in seconds to wait for events.
+
+        Returns:
+            List of (mask, filename) tuples, empty if the timeout expired.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            events.append((mask, name))
+
+        return events
+
+    def close(self) -> None:
+        """Stop watching and release the inotify file descriptor."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class StabilityWatcher:
+    """
+    Long-lived inotify watcher deciding file stability by quiescence.
+
+    A file is stable once no write activity was seen for quiet_period seconds. Files without any event
+    count from the moment the watcher was started, so a freshly started watcher reports nothing as stable
+    until quiet_period has passed.
+    """
+
+    def __init__(self, path: Path, quiet_period: float) -> None:
+        """
+        Start watching a directory.
+
+        Args:
+            path: Directory to watch.
+            quiet_period: Time in seconds without write activity after which a file is stable.
+
+        Raises:
+            OSError: If inotify is unavailable or the watch cannot be added.
+        """
+        self.quiet_period = quiet_period
+        self.started = time.monotonic()
+        self.last_event: dict[str, float] = {}
+        self._watcher = InotifyWatcher(
+            path, mask=IN_MODIFY | IN_CLOSE_WRITE | IN_CREATE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM
+        )
+
+    def poll(self, timeout: float = 0) -> None:
+        """
+        Process pending events.
+
+        Args:
+            timeout: Maximum time in seconds to wait for the first event.
+        """
+        events = self._watcher.read_events(timeout)
+        while events:
+            now = time.monotonic()
+            for mask, name in events:
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self.last_event.pop(name, None)
+                else:
+                    self.last_event[name] = now
+            events = self._watcher.read_events(0)
+
+    def is_stable(self, filename: str) -> bool:
+        """
+        Check if a file had no write activity for the quiet period.
+
+        Args:
+            filename: Name of the file in the watched directory.
+
+        Returns:
+            True if the file is quiet, False otherwise.
+        """
+        self.poll()
+        return time.monotonic() - self.last_event.get(filename, self.started) >= self.quiet_period
+
+    def stable_files(self) -> list[str]:
+        """
+        Get the files with observed activity which are quiet by now.
+
+        Returns:
+            Names of files whose last event is at least quiet_period seconds ago.
+        """
+        self.poll()
+        now = time.monotonic()
+        return [name for name, last in self.last_event.items() if now - last >= self.quiet_period]
+
+    def close(self) -> None:
+        """Stop watching and release the inotify file descriptor."""
+        self._watcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,81 +1,484 @@
 """Simple PDF merger for combining two PDF files."""
 
-import pypdf
-from pypdf.generic import ContentStream
-from pathlib import Path
-import logging
 import argparse
+import contextlib
+import fcntl
+import hashlib
+import io
+import json
+import logging
+import os
+import re
 import sys
+from pathlib import Path
+from typing import BinaryIO
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format="[%(asctime)s] [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
-
-DRAWING_OPS = {
-    b"Do",  # image or XObject
-    b"Tj",
-    b"TJ",  # text
-    b"Tf",  # font selection (text intent)
-    b"re",  # rectangle
-    b"m",
-    b"l",
-    b"c",  # path drawing
-    b"S",
-    b"s",
-    b"f",
-    b"F",
-    b"f*",  # stroke/fill
-}
+import pypdf
+from pypdf.generic import ContentStream
+
+try:
+    import pymupdf
+except ImportError:  # optional, much faster backend for parsing and merging
+    pymupdf = None  # type: ignore[assignment]
+
+DEFAULT_BLANK_CACHE_PATH = Path("~/.cache/document_mover/blank.json").expanduser()
+BLANK_CACHE_MAX_ENTRIES = 1024
+# Larger sources are not loaded into memory, both backends then parse them from the file
+IN_MEMORY_MAX_SIZE = 200 * 1024 * 1024
+# Content streams longer than this are never blank in practice, they are not scanned at all
+BLANK_CONTENT_MAX_SIZE = 8192
+
+DRAWING_OPS = frozenset(
+    {
+        b"Do",  # image or XObject
+        b"Tj",
+        b"TJ",
+        b"'",
+        b'"',  # text
+        b"Tf",  # font selection (text intent)
+        b"re",  # rectangle
+        b"m",
+        b"l",
+        b"c",  # path drawing
+        b"S",
+        b"s",
+        b"f",
+        b"F",
+        b"f*",  # stroke/fill
+    }
+)
+# Lookup table for the single byte operators, indexed by the byte value
+_SINGLE_BYTE_DRAWING_OPS = bytes(bytes([c]) in DRAWING_OPS for c in range(256))
+
+# An operator is a token delimited by whitespace or by the delimiters ( ) < > [ ] { }. A preceding "/"
+# would make it part of a name, so it does not count as delimiter before the operator.
+_TOKEN_BEFORE = rb"(?:(?<=[\x00\t\n\x0c\r ()<>\[\]{}])|\A)"
+_TOKEN_AFTER = rb"(?=[\x00\t\n\x0c\r ()<>\[\]{}/%]|\Z)"
+# Longest operators first, so f* is not matched as f
+_DRAWING_OPS_ALTERNATION = b"|".join(re.escape(op) for op in sorted(DRAWING_OPS, key=len, reverse=True))
+_DRAWING_OPS_RE = re.compile(_TOKEN_BEFORE + b"(?:" + _DRAWING_OPS_ALTERNATION + b")" + _TOKEN_AFTER)
+_INLINE_IMAGE_RE = re.compile(_TOKEN_BEFORE + rb"BI" + _TOKEN_AFTER)
+
+
+def _trim_blank_cache(cache: dict[str, list[bool]]) -> None:
+    """Drop the oldest blank page cache entries, which come first, until the cache fits its limit."""
+    while len(cache) > BLANK_CACHE_MAX_ENTRIES:
+        del cache[next(iter(cache))]
 
 
 class PDFMerger:
     """A class to merge two PDF files into one."""
 
-    def __init__(self) -> None:
-        """Initialize the PDF merger."""
+    def __init__(self, use_pymupdf: bool = True, blank_cache_path: Path | None = None) -> None:
+        """
+        Initialize the PDF merger.
+
+        Args:
+            use_pymupdf: If True, use PyMuPDF when it is installed, otherwise always use pypdf.
+            blank_cache_path: Optional JSON file persisting blank page decisions across runs. Decisions
+                are always cached in memory for the lifetime of the merger.
+        """
         self.logger = logging.getLogger(__name__)
+        self.use_pymupdf = use_pymupdf and pymupdf is not None
+        self.blank_cache_path = blank_cache_path
+        self._blank_cache: dict[str, list[bool]] | None = None
+
+    @staticmethod
+    def _read_source(pdf_path: Path) -> bytes | Path:
+        """
+        Read a source PDF once into memory, for both hashing and parsing.
+
+        Parsing from memory avoids a read() syscall per object access. Sources above IN_MEMORY_MAX_SIZE
+        stay on disk, so the resident set stays bounded for both backends.
+
+        Args:
+            pdf_path: Path of the file.
+
+        Returns:
+            The file contents, or the path for files above IN_MEMORY_MAX_SIZE.
+        """
+        pdf_path = Path(pdf_path)
+        if pdf_path.stat().st_size > IN_MEMORY_MAX_SIZE:
+            return pdf_path
+
+        return pdf_path.read_bytes()
+
+    @staticmethod
+    def _source_digest(source: bytes | Path) -> str:
+        """
+        Hash a source from _read_source() for the blank page cache.
+
+        Only called when blank pages are detected, a plain merge never hashes its sources.
+        Large sources are hashed in chunks from the file.
+
+        Args:
+            source: File contents or path of the file.
+
+        Returns:
+            Hex digest used as blank page cache key.
+        """
+        if isinstance(source, Path):
+            with open(source, "rb") as f:
+                return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+        return hashlib.blake2b(source, digest_size=16).hexdigest()
+
+    @staticmethod
+    def _open_pymupdf(source: bytes | Path) -> "pymupdf.Document":
+        """
+        Open a source from _read_source() with PyMuPDF.
+
+        Args:
+            source: File contents or path of the file.
+
+        Returns:
+            The opened document.
+        """
+        if isinstance(source, Path):
+            return pymupdf.open(source)
+
+        return pymupdf.open(stream=source, filetype="pdf")
+
+    @staticmethod
+    def _open_pypdf_stream(source: bytes | Path) -> BinaryIO:
+        """
+        Open a source from _read_source() as stream for pypdf.
+
+        pypdf reads a path completely into memory, but parses an open file in place.
+
+        Args:
+            source: File contents or path of the file.
+
+        Returns:
+            The binary stream, to be closed by the caller once the reader is no longer used.
+        """
+        if isinstance(source, Path):
+            return open(source, "rb")
+
+        return io.BytesIO(source)
+
+    def _cache_key(self, digest: str) -> str:
+        """Build the blank cache key, per backend since both may judge edge cases differently."""
+        return f"{'pymupdf' if self.use_pymupdf else 'pypdf'}:{digest}"
+
+    def _read_blank_cache_file(self) -> dict[str, list[bool]]:
+        """
+        Read the persisted blank page cache.
+
+        Returns:
+            The cached decisions, empty if there is no cache file or it is unreadable.
+        """
+        if self.blank_cache_path is None:
+            return {}
+
+        try:
+            with open(self.blank_cache_path, encoding="utf-8") as f:
+                cache = json.load(f)
+            if isinstance(cache, dict):
+                return cache
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable blank page cache %s: %s", self.blank_cache_path, e)
+
+        return {}
+
+    def _loaded_blank_cache(self) -> dict[str, list[bool]]:
+        """Get the in-memory blank page cache, loading the persisted one on first use."""
+        if self._blank_cache is None:
+            self._blank_cache = self._read_blank_cache_file()
+
+        return self._blank_cache
+
+    def get_cached_blank_pages(self, digest: str) -> list[bool] | None:
+        """
+        Look up the blank page decisions of a file.
+
+        Args:
+            digest: Digest of the file contents from _source_digest().
+
+        Returns:
+            One flag per page, True for blank pages, or None if the file is not cached.
+        """
+        return self._loaded_blank_cache().get(self._cache_key(digest))
+
+    def store_blank_pages(self, digest: str, blank_pages: list[bool]) -> None:
+        """
+        Cache the blank page decisions of a file and persist them if a cache file is configured.
+
+        Concurrent writers (e.g. merge worker processes) are serialized with a lock file and merge
+        their entries into the current file contents, which is replaced atomically.
+
+        Args:
+            digest: Digest of the file contents from _source_digest().
+            blank_pages: One flag per page, True for blank pages.
+        """
+        memory_cache = self._loaded_blank_cache()
+        key = self._cache_key(digest)
+        memory_cache.pop(key, None)
+        memory_cache[key] = blank_pages
+        # A merger is reused for every pair of a long running process, keep its memory bounded too
+        _trim_blank_cache(memory_cache)
+
+        if self.blank_cache_path is None:
+            return
+
+        try:
+            self.blank_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            lock_path = self.blank_cache_path.with_name(f"{self.blank_cache_path.name}.lock")
+            with open(lock_path, "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                cache = self._read_blank_cache_file()
+                cache.pop(key, None)
+                cache[key] = blank_pages
+                _trim_blank_cache(cache)
+
+                tmp_path = self.blank_cache_path.with_name(f".{self.blank_cache_path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(cache, f)
+                os.replace(tmp_path, self.blank_cache_path)
+                self._blank_cache = cache
+        except OSError as e:
+            self.logger.warning("Could not save blank page cache %s: %s", self.blank_cache_path, e)
+
+    def find_blank_pages(self, pdf_path: Path) -> list[bool]:
+        """
+        Get one flag per page of a PDF document, True for blank pages, using the cache when possible.
+
+        Args:
+            pdf_path: Path of the PDF document.
+
+        Returns:
+            List of blank page flags in page order.
+        """
+        data = self._read_source(pdf_path)
+
+        def detect() -> list[bool]:
+            if self.use_pymupdf:
+                with self._open_pymupdf(data) as document:
+                    return self._classify_pages(document)
+
+            with self._open_pypdf_stream(data) as stream:
+                return self._classify_pages(pypdf.PdfReader(stream))
+
+        return self._blank_pages_of(self._source_digest(data), detect)
 
     def check_document_has_blank_pages(self, pdf_path: Path) -> bool:
-        """Check if the PDF document has any blank pages."""
+        """
+        Check if the PDF document has any blank pages.
+
+        Kept for callers which only need a yes/no answer, prefer find_blank_pages(). The flags are
+        cached per file contents, so a following merge() of the same file does not detect them again.
+        """
         try:
-            with open(pdf_path, "rb") as f:
-                reader = pypdf.PdfReader(f)
-                for page in reader.pages:
-                    if self.is_blank_page(page):
-                        return True
-            return False
+            return any(self.find_blank_pages(pdf_path))
         except Exception as e:
-            self.logger.error(f"Error checking blank pages in {pdf_path}: {e}")
+            self.logger.error("Error checking blank pages in %s: %s", pdf_path, e)
             return False
 
     @staticmethod
     def is_blank_page(page: pypdf.PageObject):
         # 1. No content stream
-        if page.get_contents() is None:
+        contents = page.get_contents()
+        if contents is None:
             return True
 
-        # 2. No extractable text
-        if page.extract_text() and page.extract_text().strip():
-            return False
+        # 2. Look for images, only the keys of the XObject dictionary are needed. Its values stay
+        #    unresolved references, so no image stream gets parsed.
+        if "/Resources" in page:
+            resources = page.raw_get("/Resources").get_object()
+            if "/XObject" in resources and len(resources.raw_get("/XObject").get_object()) > 0:
+                return False
 
-        # 3. Look for images
-        resources = page.get("/Resources", {})
-        xobjects = resources.get("/XObject", {})
-        if xobjects:
+        # 3. Look for text and drawing operators, text can only be shown by the text operators so no
+        #    text extraction is needed. A byte scan avoids tokenizing the stream; operator names inside
+        #    strings can only match if text operators are present anyway.
+        data = contents.get_data()
+        if len(data) > BLANK_CONTENT_MAX_SIZE:
             return False
 
-        # 4. Look for drawing operators
-        content = ContentStream(page.get_contents(), page.pdf)
+        if not _INLINE_IMAGE_RE.search(data):
+            return _DRAWING_OPS_RE.search(data) is None
+
+        # Binary inline image data may contain anything, only the tokenizer can skip it
+        content = ContentStream(contents, page.pdf)
         for _, operator in content.operations:
-            if operator in DRAWING_OPS:
+            if len(operator) == 1:
+                if _SINGLE_BYTE_DRAWING_OPS[operator[0]]:
+                    return False
+            elif operator in DRAWING_OPS:
                 return False
 
         return True
 
+    @staticmethod
+    def is_blank_pymupdf_page(page: "pymupdf.Page") -> bool:
+        """
+        Check if a PyMuPDF page is blank, with the same criteria as is_blank_page().
+
+        Args:
+            page: The page to check.
+
+        Returns:
+            True if the page has no text, images, XObjects or drawings, False otherwise.
+        """
+        if not page.get_contents():
+            return True
+
+        # Cheap checks first, text extraction and drawing analysis parse the whole stream
+        if page.get_images(full=False) or page.get_xobjects():
+            return False
+
+        if len(page.read_contents()) > BLANK_CONTENT_MAX_SIZE:
+            return False
+
+        if page.get_text("text").strip():
+            return False
+
+        return not page.get_drawings()
+
+    def _classify_pages(self, document: "pypdf.PdfReader | pymupdf.Document") -> list[bool]:
+        """
+        Detect the blank pages of an opened document in a single pass.
+
+        Args:
+            document: Document opened with pypdf or PyMuPDF.
+
+        Returns:
+            List of blank page flags in page order.
+        """
+        if isinstance(document, pypdf.PdfReader):
+            return [self.is_blank_page(page) for page in document.pages]
+
+        return [self.is_blank_pymupdf_page(document[i]) for i in range(document.page_count)]
+
+    def _blank_pages_of(self, digest: str, detect) -> list[bool]:
+        """
+        Get the blank page flags of an opened document from the cache, or detect and cache them.
+
+        Args:
+            digest: Digest of the document contents from _source_digest().
+            detect: Function returning the blank page flags of the already opened document.
+
+        Returns:
+            List of blank page flags in page order.
+        """
+        blank_pages = self.get_cached_blank_pages(digest)
+        if blank_pages is None:
+            blank_pages = detect()
+            self.store_blank_pages(digest, blank_pages)
+
+        return blank_pages
+
+    def _merge_with_pymupdf(self, pdf1: Path, pdf2: Path, output_path: Path, remove_empty_pages: bool) -> None:
+        """
+        Merge two PDF files with PyMuPDF, alternating pages of pdf1 with reversed pages of pdf2.
+
+        Args:
+            pdf1: Path to the first PDF file.
+            pdf2: Path to the second PDF file.
+            output_path: Path where the merged PDF will be saved.
+            remove_empty_pages: If True, skip blank pages.
+        """
+        # Each source is read once, the same bytes are parsed and, for blank detection, hashed
+        data1 = self._read_source(pdf1)
+        data2 = self._read_source(pdf2)
+
+        with (
+            self._open_pymupdf(data1) as document1,
+            self._open_pymupdf(data2) as document2,
+            pymupdf.open() as merged,
+        ):
+            count1 = document1.page_count
+            count2 = document2.page_count
+            if remove_empty_pages:
+                blank1 = self._blank_pages_of(self._source_digest(data1), lambda: self._classify_pages(document1))
+                blank2 = self._blank_pages_of(self._source_digest(data2), lambda: self._classify_pages(document2))
+
+            for i in range(max(count1, count2)):
+                if i < count1:
+                    if remove_empty_pages and blank1[i]:
+                        self.logger.debug("Skipping empty page from %s at index %s", pdf1.name, i)
+                    else:
+                        merged.insert_pdf(document1, from_page=i, to_page=i)
+                if i < count2:
+                    page_index = count2 - 1 - i
+                    if remove_empty_pages and blank2[page_index]:
+                        self.logger.debug("Skipping empty page from %s at index %s", pdf2.name, i)
+                    else:
+                        merged.insert_pdf(document2, from_page=page_index, to_page=page_index)
+
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(output_path, "wb") as output_file:
+                if merged.page_count:
+                    merged.save(output_file, garbage=4, deflate=True)
+                else:
+                    # PyMuPDF refuses to save a document without pages, all pages were blank
+                    pypdf.PdfWriter().write(output_file)
+                # Make the merged file durable before callers touch it
+                output_file.flush()
+                os.fsync(output_file.fileno())
+
+    def _merge_with_pypdf(self, pdf1: Path, pdf2: Path, output_path: Path, remove_empty_pages: bool) -> None:
+        """
+        Merge two PDF files with pypdf, alternating pages of pdf1 with reversed pages of pdf2.
+
+        Args:
+            pdf1: Path to the first PDF file.
+            pdf2: Path to the second PDF file.
+            output_path: Path where the merged PDF will be saved.
+            remove_empty_pages: If True, skip blank pages.
+        """
+        # Each source is read once, the same bytes are parsed and, for blank detection, hashed
+        data1 = self._read_source(pdf1)
+        data2 = self._read_source(pdf2)
+
+        # Large sources are parsed from the file, which has to stay open until the output is written.
+        # The writer is closed as well if detection or writing fails.
+        with (
+            self._open_pypdf_stream(data1) as stream1,
+            self._open_pypdf_stream(data2) as stream2,
+            contextlib.closing(pypdf.PdfWriter()) as merger,
+        ):
+            reader1 = pypdf.PdfReader(stream1)
+            reader2 = pypdf.PdfReader(stream2)
+
+            # Pages are only addressed by index, so no page object is created for a skipped page
+            count1 = len(reader1.pages)
+            count2 = len(reader2.pages)
+            if remove_empty_pages:
+                blank1 = self._blank_pages_of(self._source_digest(data1), lambda: self._classify_pages(reader1))
+                blank2 = self._blank_pages_of(self._source_digest(data2), lambda: self._classify_pages(reader2))
+
+            # Alternate pages from both files, append() clones the shared resources of a reader only once
+            for i in range(max(count1, count2)):
+                if i < count1:
+                    if remove_empty_pages and blank1[i]:
+                        self.logger.debug("Skipping empty page from %s at index %s", pdf1.name, i)
+                    else:
+                        merger.append(reader1, pages=[i], import_outline=False)
+                if i < count2:
+                    index2 = count2 - 1 - i
+                    if remove_empty_pages and blank2[index2]:
+                        self.logger.debug("Skipping empty page from %s at index %s", pdf2.name, i)
+                    else:
+                        merger.append(reader2, pages=[index2], import_outline=False)
+
+            # Create output directory if needed
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(output_path, "wb") as output_file:
+                merger.write(output_file)
+                # Make the merged file durable before callers touch it
+                output_file.flush()
+                os.fsync(output_file.fileno())
+
     def merge(
         self,
         pdf1: str | Path,
         pdf2: str | Path,
-        output_path: Path,
+        output_path: str | Path,
         delete_source: bool = False,
         remove_empty_pages: bool = False,
     ) -> bool:
@@ -94,67 +497,44 @@ class PDFMerger:
         """
         pdf1 = Path(pdf1)
         pdf2 = Path(pdf2)
+        output_path = Path(output_path)
 
         # Validate input files
         if not pdf1.exists():
-            self.logger.error(f"PDF file not found: {pdf1}")
+            self.logger.error("PDF file not found: %s", pdf1)
             return False
         if not pdf2.exists():
-            self.logger.error(f"PDF file not found: {pdf2}")
+            self.logger.error("PDF file not found: %s", pdf2)
             return False
 
         try:
-            self.logger.info(f"Merging: {pdf1.name} + {pdf2.name}")
-
-            merger = pypdf.PdfWriter()
-
-            with open(pdf1, "rb") as f1, open(pdf2, "rb") as f2:
-                reader1 = pypdf.PdfReader(f1)
-                reader2 = pypdf.PdfReader(f2)
-
-                pages1 = list(reader1.pages)
-                pages2 = list(reversed(reader2.pages))
-
-                # Alternate pages from both files
-                max_pages = max(len(pages1), len(pages2))
-                for i in range(max_pages):
-                    if i < len(pages1):
-                        if remove_empty_pages and self.is_blank_page(pages1[i]):
-                            self.logger.debug(f"Skipping empty page from {pdf1.name} at index {i}")
-                        else:
-                            merger.add_page(pages1[i])
-                    if i < len(pages2):
-                        if remove_empty_pages and self.is_blank_page(pages2[i]):
-                            self.logger.debug(f"Skipping empty page from {pdf2.name} at index {i}")
-                        else:
-                            merger.add_page(pages2[i])
+            self.logger.info("Merging: %s + %s", pdf1.name, pdf2.name)
 
-            # Create output directory if needed
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.use_pymupdf:
+                self._merge_with_pymupdf(pdf1, pdf2, output_path, remove_empty_pages)
+            else:
+                self._merge_with_pypdf(pdf1, pdf2, output_path, remove_empty_pages)
 
-            merger.write(output_path)
-            merger.close()
-
-            self.logger.info(f"Successfully created merged PDF: {output_path}")
+            self.logger.info("Successfully created merged PDF: %s", output_path)
 
             # Delete source files if requested
             if delete_source:
                 try:
                     pdf1.unlink()
-                    self.logger.info(f"Deleted source file: {pdf1.name}")
+                    self.logger.info("Deleted source file: %s", pdf1.name)
                 except Exception as e:
-                    self.logger.warning(f"Failed to delete {pdf1.name}: {e}")
+                    self.logger.warning("Failed to delete %s: %s", pdf1.name, e)
 
                 try:
                     pdf2.unlink()
-                    self.logger.info(f"Deleted source file: {pdf2.name}")
+                    self.logger.info("Deleted source file: %s", pdf2.name)
                 except Exception as e:
-                    self.logger.warning(f"Failed to delete {pdf2.name}: {e}")
+                    self.logger.warning("Failed to delete %s: %s", pdf2.name, e)
 
             return True
 
         except Exception as e:
-            self.logger.error(f"Error merging PDF files: {e}")
+            self.logger.error("Error merging PDF files: %s", e)
             return False
 
 
@@ -176,6 +556,15 @@ def parse_arguments():
         "--remove-empty-pages", action="store_true", help="Remove empty or whitespace-only pages from merged PDF"
     )
 
+    parser.add_argument(
+        "--blank-cache",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_BLANK_CACHE_PATH,
+        default=None,
+        help=f"Persist blank page decisions in a JSON file, {DEFAULT_BLANK_CACHE_PATH} if no path is given",
+    )
+
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
 
     return parser.parse_args()
@@ -185,11 +574,18 @@ def main():
     """Main CLI entry point."""
     args = parse_arguments()
 
+    # Setup logging, only when run as a program so importing the module leaves the root logger alone
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
     # Set logging level
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
-    merger = PDFMerger()
+    merger = PDFMerger(blank_cache_path=args.blank_cache)
     success = merger.merge(
         args.pdf1, args.pdf2, args.output, delete_source=args.delete_source, remove_empty_pages=args.remove_empty_pages
     )
@@ -0,0 +1,15 @@
+"""Shared pytest configuration."""
+
+import os
+
+# tmpfs mount used for test directories when available, so fixture and merge I/O never hits a disk
+SHARED_MEMORY_DIR = "/dev/shm"
+
+
+def pytest_configure(config):
+    """Place tmp_path directories on tmpfs unless a temporary root was chosen explicitly."""
+    if "PYTEST_DEBUG_TEMPROOT" in os.environ:
+        return
+
+    if os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK | os.X_OK):
+        os.environ["PYTEST_DEBUG_TEMPROOT"] = SHARED_MEMORY_DIR
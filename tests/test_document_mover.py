@@ -1,48 +1,56 @@
 #!/usr/bin/env python3
 """Tests for document_mover functionality."""
 
+import ctypes
+import errno
+import io
+import json
 import os
-import tempfile
+import threading
+import time
 from pathlib import Path
-from unittest.mock import Mock, patch
 
 import pytest
 from pypdf import PdfWriter
 
-from document_mover.document_mover import ScanFileProcessor, FileStats
+from document_mover import file_list as file_list_module
+from document_mover import file_ops
+from document_mover.document_mover import FileStats, ScanFileProcessor
+from document_mover.file_list import TAG_DUAL, TAG_SINGLE_DUAL, FileListHandler, compile_matcher
+from document_mover.inotify_stability import StabilityWatcher, inotify_available
 
 
 @pytest.fixture
-def temp_dir():
-    """Create a temporary directory for test files."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        yield Path(tmpdir)
-
-
-@pytest.fixture
-def source_dir(temp_dir):
+def source_dir(tmp_path):
     """Create a source directory."""
-    source = temp_dir / "source"
+    source = tmp_path / "source"
     source.mkdir()
     return source
 
 
 @pytest.fixture
-def dest_dir(temp_dir):
+def dest_dir(tmp_path):
     """Create a destination directory."""
-    dest = temp_dir / "dest"
+    dest = tmp_path / "dest"
     dest.mkdir()
     return dest
 
 
+@pytest.fixture(scope="session")
+def blank_pdf_bytes():
+    """Contents of a PDF with one blank page, serialized in memory once per session."""
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
 @pytest.fixture
-def sample_pdf_file(source_dir):
+def sample_pdf_file(source_dir, blank_pdf_bytes):
     """Create a sample PDF file."""
     pdf_path = source_dir / "sample.pdf"
-    writer = PdfWriter()
-    writer.add_blank_page(width=200, height=200)
-    with open(pdf_path, "wb") as f:
-        writer.write(f)
+    pdf_path.write_bytes(blank_pdf_bytes)
     return pdf_path
 
 
@@ -55,15 +63,12 @@ def sample_jpg_file(source_dir):
 
 
 @pytest.fixture
-def dual_sided_pdfs(source_dir):
+def dual_sided_pdfs(source_dir, blank_pdf_bytes):
     """Create dual-sided PDF files."""
     files = []
     for i in range(1, 5):
         pdf_path = source_dir / f"double-sided_{i}.pdf"
-        writer = PdfWriter()
-        writer.add_blank_page(width=200, height=200)
-        with open(pdf_path, "wb") as f:
-            writer.write(f)
+        pdf_path.write_bytes(blank_pdf_bytes)
         files.append(pdf_path)
     return files
 
@@ -75,9 +80,11 @@ def processor(source_dir, dest_dir):
         source_dir=str(source_dir),
         dest_dir=str(dest_dir),
         dual_side_prefix="double-sided",
+        single_dual_side_prefix=None,
         user_id=os.getuid(),
         group_id=os.getgid(),
         stability_wait=0,  # No wait for tests
+        stability_wait_single_dual_side=0,
         max_age=10,
         file_types=[".pdf", ".jpg", ".jpeg", ".png", ".tiff", ".tif"],
         dry_run=False,
@@ -93,22 +100,25 @@ class TestScanFileProcessor:
             source_dir=str(source_dir),
             dest_dir=str(dest_dir),
             dual_side_prefix="double-sided",
+            single_dual_side_prefix=None,
             user_id=1000,
             group_id=1000,
             stability_wait=5,
+            stability_wait_single_dual_side=0,
             max_age=30,
             file_types=[".pdf"],
         )
 
         assert processor.source_dir == source_dir
         assert processor.dest_dir == dest_dir
-        assert processor.dual_side_prefix == "double-sided"
+        assert processor.dual_side_prefix_pattern == "double-sided"
         assert processor.stability_wait == 5
         assert processor.max_age_seconds == 1800  # 30 * 60
 
     def test_get_files_to_process(self, sample_pdf_file, sample_jpg_file, processor):
         """Test getting files to process."""
-        files = processor.get_files_to_process()
+        processor.file_list.snapshot_sizes()
+        files = [stats.path for stats in processor.file_list.files.values()]
 
         assert len(files) >= 2
         assert sample_pdf_file in files
@@ -120,40 +130,38 @@ class TestScanFileProcessor:
         txt_file = source_dir / "test.txt"
         txt_file.write_text("not a pdf")
 
-        files = processor.get_files_to_process()
+        processor.file_list.snapshot_sizes()
+        files = [stats.path for stats in processor.file_list.files.values()]
 
         assert txt_file not in files
         assert sample_pdf_file in files
 
     def test_collect_file_stats(self, sample_pdf_file, processor):
         """Test collecting file statistics."""
-        files = [sample_pdf_file]
-        processor.collect_file_stats(files)
+        processor.file_list.snapshot_sizes()
 
-        assert sample_pdf_file.name in processor.file_stats
-        stats = processor.file_stats[sample_pdf_file.name]
-        assert stats["path"] == sample_pdf_file
-        assert stats["initial_size"] > 0
-        assert stats["age"] >= 0
-        assert stats["is_stable"] is False
+        assert sample_pdf_file.name in processor.file_list.files
+        stats = processor.file_list.files[sample_pdf_file.name]
+        assert stats.path == sample_pdf_file
+        assert stats.initial_size > 0
+        assert stats.age >= 0
+        assert stats.is_stable is False
 
     def test_check_file_stability(self, sample_pdf_file, processor):
         """Test file stability checking."""
-        files = [sample_pdf_file]
-        processor.collect_file_stats(files)
-        processor.check_file_stability()
+        processor.file_list.snapshot_sizes()
+        processor.file_list.update_file_stats(stability_wait=0)
 
-        stats = processor.file_stats[sample_pdf_file.name]
-        assert stats["final_size"] > 0
-        assert stats["is_stable"] is True
+        stats = processor.file_list.files[sample_pdf_file.name]
+        assert stats.final_size > 0
+        assert stats.is_stable is True
 
     def test_move_file_success(self, sample_pdf_file, dest_dir, processor):
         """Test successful file move."""
-        files = [sample_pdf_file]
-        processor.collect_file_stats(files)
-        processor.check_file_stability()
+        processor.file_list.snapshot_sizes()
+        processor.file_list.update_file_stats(stability_wait=0)
 
-        file_stat = processor.file_stats[sample_pdf_file.name]
+        file_stat = processor.file_list.files[sample_pdf_file.name]
         result = processor.move_file(file_stat)
 
         assert result is True
@@ -162,11 +170,10 @@ class TestScanFileProcessor:
 
     def test_move_file_with_permissions(self, sample_pdf_file, dest_dir, processor):
         """Test that file permissions are set correctly."""
-        files = [sample_pdf_file]
-        processor.collect_file_stats(files)
-        processor.check_file_stability()
+        processor.file_list.snapshot_sizes()
+        processor.file_list.update_file_stats(stability_wait=0)
 
-        file_stat = processor.file_stats[sample_pdf_file.name]
+        file_stat = processor.file_list.files[sample_pdf_file.name]
         processor.move_file(file_stat)
 
         moved_file = dest_dir / sample_pdf_file.name
@@ -181,24 +188,50 @@ class TestScanFileProcessor:
         dest_file = dest_dir / sample_pdf_file.name
         dest_file.write_bytes(sample_pdf_file.read_bytes())
 
-        files = [sample_pdf_file]
-        processor.collect_file_stats(files)
-        processor.check_file_stability()
+        processor.file_list.snapshot_sizes()
+        processor.file_list.update_file_stats(stability_wait=0)
 
-        file_stat = processor.file_stats[sample_pdf_file.name]
+        file_stat = processor.file_list.files[sample_pdf_file.name]
         result = processor.move_file(file_stat)
 
         assert result is False
 
+    def test_move_file_falls_back_to_copy_on_exdev(self, sample_pdf_file, dest_dir, processor, monkeypatch):
+        """Test that a rename refused with EXDEV on the same st_dev (e.g. a bind mount) copies the file."""
+
+        def renameat2(*args):
+            ctypes.set_errno(errno.EXDEV)
+            return -1
+
+        monkeypatch.setattr(file_ops, "_libc_renameat2", lambda: renameat2)
+        processor.file_list.snapshot_sizes()
+        processor.file_list.update_file_stats(stability_wait=0)
+        assert processor._same_fs is True
+
+        result = processor.move_file(processor.file_list.files[sample_pdf_file.name])
+
+        assert result is True
+        assert not sample_pdf_file.exists()
+        assert (dest_dir / sample_pdf_file.name).exists()
+
+    def test_symlink_is_not_collected(self, sample_pdf_file, source_dir, processor):
+        """Test that a symlink in the source directory is never collected, so it is not moved."""
+        link = source_dir / "link.pdf"
+        link.symlink_to(sample_pdf_file)
+
+        processor.file_list.snapshot_sizes()
+
+        assert link.name not in processor.file_list.files
+        assert sample_pdf_file.name in processor.file_list.files
+
     def test_dry_run_mode(self, sample_pdf_file, processor):
         """Test dry-run mode doesn't move files."""
         processor.dry_run = True
 
-        files = [sample_pdf_file]
-        processor.collect_file_stats(files)
-        processor.check_file_stability()
+        processor.file_list.snapshot_sizes()
+        processor.file_list.update_file_stats(stability_wait=0)
 
-        file_stat = processor.file_stats[sample_pdf_file.name]
+        file_stat = processor.file_list.files[sample_pdf_file.name]
         result = processor.move_file(file_stat)
 
         assert result is True
@@ -221,19 +254,23 @@ class TestScanFileProcessor:
         assert result >= 1
         assert not sample_pdf_file.exists()
 
-    def test_get_file_age_static_method(self, sample_pdf_file):
-        """Test static file age getter."""
-        age = ScanFileProcessor.get_file_age(sample_pdf_file)
+    def test_file_age_from_scan(self, sample_pdf_file, processor):
+        """Test that the directory scan records the file age."""
+        processor.file_list.snapshot_sizes()
+        age = processor.file_list.files[sample_pdf_file.name].age
 
         assert age >= 0
         assert isinstance(age, float)
 
-    def test_get_file_age_nonexistent_file(self):
-        """Test get_file_age returns 0 for nonexistent file."""
+    def test_refresh_nonexistent_file(self):
+        """Test that refreshing the stats of a nonexistent file reports it as missing."""
         nonexistent = Path("/nonexistent/path/file.txt")
-        age = ScanFileProcessor.get_file_age(nonexistent)
+        stats = FileStats(
+            path_str=str(nonexistent), name=nonexistent.name, initial_size=0, age=0, final_size=0, is_stable=False
+        )
 
-        assert age == 0
+        assert stats.refresh() is False
+        assert stats.stat_result is None
 
     def test_file_types_normalization(self, source_dir, dest_dir):
         """Test that file types are normalized."""
@@ -241,9 +278,11 @@ class TestScanFileProcessor:
             source_dir=str(source_dir),
             dest_dir=str(dest_dir),
             dual_side_prefix="double-sided",
+            single_dual_side_prefix=None,
             user_id=1000,
             group_id=1000,
             stability_wait=0,
+            stability_wait_single_dual_side=0,
             max_age=10,
             file_types=["pdf", "PDF", ".jpg", ".JPG"],  # Mixed case and with/without dot
         )
@@ -258,10 +297,9 @@ class TestDualSidedFileProcessing:
 
     def test_dual_sided_file_detection(self, dual_sided_pdfs, processor):
         """Test detection of dual-sided files."""
-        files = processor.get_files_to_process()
-        processor.collect_file_stats(files)
+        processor.file_list.snapshot_sizes()
 
-        dual_side_count = sum(1 for f in files if f.name.startswith("double-sided"))
+        dual_side_count = sum(1 for stats in processor.file_list.files.values() if stats.has_tag("dual-side"))
         assert dual_side_count == 4
 
     def test_dual_sided_file_pairing(self, dual_sided_pdfs, processor):
@@ -276,9 +314,68 @@ class TestDualSidedFileProcessing:
         processor.run()
 
         # Check if merged files were created in destination
-        merged_files = list(dest_dir.glob("double-sided_*_merged.pdf"))
-        # We should have at least 1 merged file from pairs (1,2) and (3,4)
-        assert len(merged_files) >= 1
+        merged_files = list(dest_dir.glob("dual-side_*_merged.pdf"))
+        # One merged file each from pairs (1,2) and (3,4)
+        assert len(merged_files) == 2
+
+    def test_corrupt_pair_does_not_stop_other_merges(self, dual_sided_pdfs, dest_dir, processor):
+        """Test that a failing pair in the merge worker pool leaves the other pair unaffected."""
+        dual_sided_pdfs[2].write_bytes(b"not a pdf")
+        pairs = [
+            (dual_sided_pdfs[0], dual_sided_pdfs[1], dest_dir / "dual-side_1_2_merged.pdf"),
+            (dual_sided_pdfs[2], dual_sided_pdfs[3], dest_dir / "dual-side_3_4_merged.pdf"),
+        ]
+
+        result = processor.merge_pdf_pairs(pairs)
+
+        assert result == 1
+        assert (dest_dir / "dual-side_1_2_merged.pdf").exists()
+        assert not dual_sided_pdfs[0].exists()
+        assert not dual_sided_pdfs[1].exists()
+        # Sources of the failed pair are kept for another attempt
+        assert not (dest_dir / "dual-side_3_4_merged.pdf").exists()
+        assert dual_sided_pdfs[2].exists()
+        assert dual_sided_pdfs[3].exists()
+
+    def test_merge_workers_persist_blank_cache(self, dual_sided_pdfs, source_dir, dest_dir, tmp_path):
+        """Test that the merge worker pool stores blank page decisions in the configured cache file."""
+        blank_cache = tmp_path / "blank.json"
+        processor = ScanFileProcessor(
+            source_dir=str(source_dir),
+            dest_dir=str(dest_dir),
+            dual_side_prefix="double-sided",
+            single_dual_side_prefix=None,
+            user_id=os.getuid(),
+            group_id=os.getgid(),
+            stability_wait=0,
+            stability_wait_single_dual_side=0,
+            max_age=10,
+            file_types=[".pdf"],
+            blank_cache=str(blank_cache),
+        )
+        pairs = [
+            (dual_sided_pdfs[0], dual_sided_pdfs[1], dest_dir / "dual-side_1_2_merged.pdf"),
+            (dual_sided_pdfs[2], dual_sided_pdfs[3], dest_dir / "dual-side_3_4_merged.pdf"),
+        ]
+
+        assert processor.pdf_merger.blank_cache_path == blank_cache
+        assert processor.merge_pdf_pairs(pairs) == 2
+        assert json.loads(blank_cache.read_text())
+
+    def test_failing_pair_result_is_not_counted(self, dual_sided_pdfs, dest_dir, processor, monkeypatch):
+        """Test that an error while handling one pool result is logged and the other pair still counts."""
+        pairs = [
+            (dual_sided_pdfs[0], dual_sided_pdfs[1], dest_dir / "dual-side_1_2_merged.pdf"),
+            (dual_sided_pdfs[2], dual_sided_pdfs[3], dest_dir / "dual-side_3_4_merged.pdf"),
+        ]
+
+        def finalize(output_path):
+            if output_path.name == "dual-side_3_4_merged.pdf":
+                raise PermissionError("chown not permitted")
+
+        monkeypatch.setattr(processor, "finalize_merged_file", finalize)
+
+        assert processor.merge_pdf_pairs(pairs) == 1
 
     def test_run_return_value_counts_merged(self, dual_sided_pdfs, processor):
         """Test that run returns correct count of processed files."""
@@ -317,9 +414,11 @@ class TestErrorHandling:
             source_dir="/nonexistent/source",
             dest_dir=str(dest_dir),
             dual_side_prefix="double-sided",
+            single_dual_side_prefix=None,
             user_id=os.getuid(),
             group_id=os.getgid(),
             stability_wait=0,
+            stability_wait_single_dual_side=0,
             max_age=10,
             file_types=[".pdf"],
         )
@@ -333,9 +432,11 @@ class TestErrorHandling:
             source_dir=str(source_dir),
             dest_dir="/nonexistent/dest",
             dual_side_prefix="double-sided",
+            single_dual_side_prefix=None,
             user_id=os.getuid(),
             group_id=os.getgid(),
             stability_wait=0,
+            stability_wait_single_dual_side=0,
             max_age=10,
             file_types=[".pdf"],
         )
@@ -345,47 +446,220 @@ class TestErrorHandling:
 
     def test_unstable_file_skipped(self, sample_pdf_file, processor):
         """Test that unstable files are skipped."""
-        files = [sample_pdf_file]
-        processor.collect_file_stats(files)
+        processor.file_list.snapshot_sizes()
 
         # Don't check stability, mark file as unstable manually
-        processor.file_stats[sample_pdf_file.name]["is_stable"] = False
+        processor.file_list.files[sample_pdf_file.name].is_stable = False
 
-        file_stat = processor.file_stats[sample_pdf_file.name]
-        result = processor.move_file(file_stat)
+        result = processor.process_files(has_tagged_files=False)
 
-        assert result is False
+        assert result == 0
         assert sample_pdf_file.exists()
 
-    def test_single_dual_sided_file_not_merged(self, source_dir, dest_dir, processor):
+    def test_single_dual_sided_file_not_merged(self, source_dir, dest_dir, processor, blank_pdf_bytes):
         """Test that a single dual-sided file is not merged (waiting for pair)."""
         # Create only one dual-sided PDF
         pdf_path = source_dir / "double-sided_1.pdf"
-        writer = PdfWriter()
-        writer.add_blank_page(width=200, height=200)
-        with open(pdf_path, "wb") as f:
-            writer.write(f)
+        pdf_path.write_bytes(blank_pdf_bytes)
 
         result = processor.run()
 
         # Single file should not be merged, should remain in source
+        assert result == 0
         assert pdf_path.exists()
         assert len(list(dest_dir.glob("*"))) == 0  # No files in destination
 
-    def test_odd_number_dual_sided_files(self, source_dir, dest_dir, processor):
-        """Test that odd number of dual-sided files leaves last one unmerged."""
+    def test_odd_number_dual_sided_files(self, source_dir, dest_dir, processor, blank_pdf_bytes):
+        """Test that an odd number of dual-sided files is not merged, a side is missing."""
         # Create 3 dual-sided PDFs (odd number)
         for i in range(1, 4):
-            pdf_path = source_dir / f"double-sided_{i}.pdf"
-            writer = PdfWriter()
-            writer.add_blank_page(width=200, height=200)
-            with open(pdf_path, "wb") as f:
-                writer.write(f)
+            (source_dir / f"double-sided_{i}.pdf").write_bytes(blank_pdf_bytes)
 
         result = processor.run()
 
-        # First pair (1,2) should be merged, file 3 should remain
-        assert (source_dir / "double-sided_3.pdf").exists()
-        # Should have one merged file
-        merged_files = list(dest_dir.glob("double-sided_*_merged.pdf"))
-        assert len(merged_files) >= 1
+        # Pairing would be ambiguous, all files stay in the source directory
+        assert result == 0
+        assert all((source_dir / f"double-sided_{i}.pdf").exists() for i in range(1, 4))
+        assert not list(dest_dir.glob("dual-side_*_merged.pdf"))
+
+
+class TestFileListHandler:
+    """Test cases for FileListHandler stability checks."""
+
+    @pytest.mark.skipif(not inotify_available(), reason="inotify not available")
+    def test_close_write_ends_stability_wait(self, source_dir):
+        """Test that closing a file being written ends the stability wait early."""
+        # The writer thread closes the file itself, the with block only guarantees the close if the test fails
+        with open(source_dir / "scan_1.pdf", "wb") as handle:
+            handle.write(b"partial")
+            handle.flush()
+
+            def finish_writing():
+                time.sleep(0.2)
+                handle.write(b" content")
+                handle.close()
+
+            writer = threading.Thread(target=finish_writing)
+            writer.start()
+
+            file_list = FileListHandler(source_dir, [".pdf"])
+            start = time.monotonic()
+            file_list.parse_files(stability_wait=10, only_stable_files=False)
+            writer.join()
+
+        stats = file_list.files["scan_1.pdf"]
+        assert time.monotonic() - start < 5
+        assert stats.is_stable is True
+        assert stats.final_size == len(b"partial content")
+
+    def test_sort_by_number_is_numeric(self, source_dir):
+        """Test that files are sorted by their number, not lexicographically."""
+        for number in (10, 2, 1):
+            (source_dir / f"double-sided_{number}.pdf").write_bytes(b"content")
+
+        file_list = FileListHandler(source_dir, [".pdf"])
+        file_list.parse_files(stability_wait=0, only_stable_files=False)
+
+        files = file_list.get_untagged_files(sort_by_number=True)
+        assert [stats.number for stats in files] == [1, 2, 10]
+
+    def test_old_files_skip_stability_wait(self, source_dir):
+        """Test that files older than max_age are stable without waiting."""
+        old_file = source_dir / "scan_1.pdf"
+        old_file.write_bytes(b"content")
+        old_mtime = time.time() - 3600
+        os.utime(old_file, (old_mtime, old_mtime))
+
+        file_list = FileListHandler(source_dir, [".pdf"])
+        start = time.monotonic()
+        file_list.parse_files(stability_wait=10, only_stable_files=False, max_age=600)
+
+        assert time.monotonic() - start < 5
+        assert file_list.files["scan_1.pdf"].is_stable is True
+
+    def test_old_empty_file_is_not_stable(self, source_dir):
+        """Test that an empty file older than max_age, e.g. an aborted upload, is never stable."""
+        empty_file = source_dir / "scan_1.pdf"
+        empty_file.touch()
+        old_mtime = time.time() - 3600
+        os.utime(empty_file, (old_mtime, old_mtime))
+
+        file_list = FileListHandler(source_dir, [".pdf"])
+        file_list.parse_files(stability_wait=0, only_stable_files=True, max_age=600)
+
+        assert "scan_1.pdf" not in file_list.files
+
+    def test_finalize_after_wait_detects_new_file(self, source_dir):
+        """Test that a file added after the snapshot makes the directory unstable."""
+        (source_dir / "double-sided_1.pdf").write_bytes(b"content")
+
+        file_list = FileListHandler(source_dir, [".pdf"])
+        file_list.snapshot_sizes()
+        (source_dir / "double-sided_2.pdf").write_bytes(b"content")
+        file_list.finalize_after_wait()
+
+        assert file_list.files["double-sided_1.pdf"].is_stable is True
+        assert file_list.directory_stable is False
+
+    @pytest.mark.skipif(not inotify_available(), reason="inotify not available")
+    def test_stability_watcher_decides_without_waiting(self, source_dir):
+        """Test that a stability watcher marks quiet files stable and recently written ones unstable."""
+        (source_dir / "scan_1.pdf").write_bytes(b"content")
+
+        with StabilityWatcher(source_dir, quiet_period=0.2) as stability_watcher:
+            time.sleep(0.3)
+            (source_dir / "scan_2.pdf").write_bytes(b"content")
+
+            file_list = FileListHandler(source_dir, [".pdf"], stability_watcher=stability_watcher)
+            start = time.monotonic()
+            file_list.parse_files(stability_wait=10, only_stable_files=False)
+
+            assert time.monotonic() - start < 5
+            assert file_list.files["scan_1.pdf"].is_stable is True
+            assert file_list.files["scan_2.pdf"].is_stable is False
+            assert stability_watcher.stable_files() == []
+
+            time.sleep(0.3)
+            assert stability_watcher.stable_files() == ["scan_2.pdf"]
+
+    def test_classify_prefers_single_dual_tag(self, source_dir):
+        """Test that classify puts files matching both patterns into the single dual-side list only."""
+        for name in ("scan_1.pdf", "double-sided_2.pdf", "single-double-sided_3.pdf", "double-sided_4.jpg"):
+            (source_dir / name).write_bytes(b"content")
+
+        file_list = FileListHandler(
+            source_dir,
+            [".pdf", ".jpg"],
+            tag_patterns={"dual-side": "double-sided", "single-dual-side": "single-double-sided"},
+        )
+        file_list.parse_files(stability_wait=0, only_stable_files=False)
+
+        untagged, dual, single_dual = file_list.classify("dual-side", "single-dual-side", only_stable=False)
+        assert [stats.path.name for stats in untagged] == ["scan_1.pdf"]
+        assert [stats.path.name for stats in dual] == ["double-sided_2.pdf"]
+        assert [stats.path.name for stats in single_dual] == ["single-double-sided_3.pdf"]
+
+    def test_tags_are_bits(self, source_dir):
+        """Test that tag names and tag bits address the same tags."""
+        (source_dir / "double-sided_1.pdf").write_bytes(b"content")
+
+        file_list = FileListHandler(source_dir, [".pdf"], tag_patterns={"dual-side": "double-sided"})
+        file_list.parse_files(stability_wait=0, only_stable_files=False)
+
+        stats = file_list.files["double-sided_1.pdf"]
+        assert stats.has_tag_bit(TAG_DUAL) is True
+        assert stats.has_tag("dual-side") is True
+        assert stats.has_tag("single-dual-side") is False
+        assert stats.has_tag("") is False
+
+        stats.add_tag("single-dual-side")
+        assert stats.has_tag_bit(TAG_SINGLE_DUAL) is True
+
+    def test_unknown_tag_query_registers_no_tag(self, source_dir):
+        """Test that querying an unknown tag name returns nothing and allocates no tag bit."""
+        (source_dir / "double-sided_1.pdf").write_bytes(b"content")
+
+        file_list = FileListHandler(source_dir, [".pdf"], tag_patterns={"dual-side": "double-sided"})
+        file_list.parse_files(stability_wait=0, only_stable_files=False)
+        known_tags = dict(file_list_module._TAG_BITS)
+
+        assert file_list.files["double-sided_1.pdf"].has_tag("typo") is False
+        assert file_list.get_files_with_tag("typo", only_stable=False) == []
+        assert file_list_module._TAG_BITS == known_tags
+
+    @pytest.mark.parametrize(
+        "pattern,name,expected",
+        [
+            ("double-sided", "scan_double-sided_1.pdf", True),
+            ("double-sided", "scan_1.pdf", False),
+            ("^double-sided", "scan_double-sided_1.pdf", False),
+            ("^double-sided", "double-sided_1.pdf", True),
+        ],
+    )
+    def test_compile_matcher_behaves_like_search(self, pattern, name, expected):
+        """Test that literal and regex patterns both match anywhere in the name like re.search."""
+        assert bool(compile_matcher(pattern)(name)) is expected
+
+    def test_unchanged_directory_skips_stability_wait(self, source_dir, tmp_path):
+        """Test that a directory unchanged since the saved state is stable without waiting."""
+        (source_dir / "double-sided_1.pdf").write_bytes(b"content")
+        state_file = tmp_path / "state.json"
+
+        file_list = FileListHandler(source_dir, [".pdf"], tag_patterns={"dual-side": "double-sided"})
+        file_list.snapshot_sizes()
+        file_list.finalize_after_wait()
+        file_list.save_state(state_file)
+
+        file_list = FileListHandler(source_dir, [".pdf"], tag_patterns={"dual-side": "double-sided"})
+        file_list.snapshot_sizes()
+        file_list.load_state(state_file)
+        start = time.monotonic()
+        assert file_list.is_directory_stable(stability_wait=10) is True
+        assert time.monotonic() - start < 5
+        assert file_list.files["double-sided_1.pdf"].is_stable is True
+
+        (source_dir / "double-sided_2.pdf").write_bytes(b"content")
+        file_list = FileListHandler(source_dir, [".pdf"], tag_patterns={"dual-side": "double-sided"})
+        file_list.snapshot_sizes()
+        file_list.load_state(state_file)
+        assert file_list.unchanged_since_state() is False
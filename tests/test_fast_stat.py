@@ -0,0 +1,46 @@
+"""Tests for the statx based size helpers."""
+
+import os
+
+import pytest
+
+from document_mover.fast_stat import URING_BATCH_SIZE, _stat_sizes_uring, stat_size, stat_sizes
+
+
+class TestStatSize:
+    """Test cases for stat_size."""
+
+    @pytest.mark.parametrize("sync", [True, False])
+    def test_size_matches_os_stat(self, tmp_path, sync):
+        """Test that both the synced and the cached lookup report the size of a file."""
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(b"x" * 1234)
+
+        assert stat_size(path, sync=sync) == os.stat(path).st_size == 1234
+
+    def test_missing_file_raises(self, tmp_path):
+        """Test that a missing file raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            stat_size(tmp_path / "missing.pdf")
+
+
+class TestStatSizes:
+    """Test cases for stat_sizes."""
+
+    def test_uring_batches_match_os_stat(self, tmp_path):
+        """Test that batched io_uring sizes over several batches match os.stat() and report missing files."""
+        pytest.importorskip("liburing")
+        paths = []
+        for i in range(URING_BATCH_SIZE + 10):
+            path = tmp_path / f"scan_{i}.pdf"
+            path.write_bytes(b"x" * i)
+            paths.append(path)
+        paths.insert(URING_BATCH_SIZE // 2, tmp_path / "missing.pdf")
+
+        try:
+            sizes = _stat_sizes_uring(paths, sync=True)
+        except OSError as e:
+            pytest.skip(f"io_uring not usable: {e}")
+
+        assert sizes == [os.stat(path).st_size if path.exists() else None for path in paths]
+        assert stat_sizes(paths) == sizes
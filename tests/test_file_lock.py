@@ -0,0 +1,34 @@
+"""Tests for the single instance lock."""
+
+import os
+
+import pytest
+
+from document_mover.file_lock import FileLock
+
+
+class TestFileLock:
+    """Test cases for FileLock."""
+
+    def test_second_instance_exits_and_keeps_holder_pid(self, tmp_path):
+        """Test that a second lock on a held lock file exits cleanly without touching the holder's PID."""
+        lock_file = tmp_path / "document_mover.lock"
+
+        with FileLock(lock_file):
+            with pytest.raises(SystemExit) as exc_info, FileLock(lock_file):
+                pass
+
+            assert exc_info.value.code == 0
+            assert lock_file.read_text() == str(os.getpid())
+
+    def test_lock_file_is_kept_and_reusable_after_release(self, tmp_path):
+        """Test that the lock file stays after release and can be acquired again."""
+        lock_file = tmp_path / "document_mover.lock"
+
+        with FileLock(lock_file):
+            pass
+        assert lock_file.exists()
+
+        with FileLock(lock_file) as lock:
+            assert lock.lock_fd is not None
+        assert lock.lock_fd is None
@@ -0,0 +1,130 @@
+"""Tests for the file operation helpers."""
+
+import errno
+import os
+import stat
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from document_mover.file_ops import move_across_filesystems, set_owner_and_mode
+
+
+@pytest.fixture
+def other_fs_dir(tmp_path):
+    """Create a directory on another filesystem than tmp_path, skip if there is none."""
+    tmp_dev = os.stat(tmp_path).st_dev
+    for candidate in ("/dev/shm", tempfile.gettempdir()):
+        if os.path.isdir(candidate) and os.access(candidate, os.W_OK) and os.stat(candidate).st_dev != tmp_dev:
+            with tempfile.TemporaryDirectory(dir=candidate) as directory:
+                yield Path(directory)
+            return
+
+    pytest.skip("no second filesystem available")
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    """Create a source file with distinct mode and timestamps."""
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(b"%PDF-1.7 scan data")
+    os.chmod(path, 0o640)
+    os.utime(path, ns=(1_600_000_000_000_000_000, 1_600_000_123_456_789_000))
+    return path
+
+
+class TestMoveAcrossFilesystems:
+    """Test cases for move_across_filesystems."""
+
+    def test_preserves_contents_mode_and_mtime(self, source_file, other_fs_dir):
+        """Test that the moved file keeps its contents, permission bits and timestamps."""
+        src_stat = source_file.stat()
+        dst = other_fs_dir / "scan.pdf"
+
+        move_across_filesystems(source_file, dst)
+
+        assert not source_file.exists()
+        assert dst.read_bytes() == b"%PDF-1.7 scan data"
+        dst_stat = dst.stat()
+        assert stat.S_IMODE(dst_stat.st_mode) == 0o640
+        assert dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+    def test_existing_destination_is_not_overwritten(self, source_file, tmp_path):
+        """Test that an existing destination is kept and the source is not removed."""
+        dst_dir = tmp_path / "dest"
+        dst_dir.mkdir()
+        dst = dst_dir / "scan.pdf"
+        dst.write_bytes(b"existing")
+
+        with pytest.raises(FileExistsError):
+            move_across_filesystems(source_file, dst)
+
+        assert dst.read_bytes() == b"existing"
+        assert source_file.exists()
+        assert os.listdir(dst_dir) == ["scan.pdf"]
+
+    def test_named_temporary_file_fallback_leaves_no_temporary_file(self, source_file, tmp_path, monkeypatch):
+        """Test the path without O_TMPFILE, for success and for an existing destination."""
+        monkeypatch.delattr(os, "O_TMPFILE", raising=False)
+        dst_dir = tmp_path / "dest"
+        dst_dir.mkdir()
+
+        move_across_filesystems(source_file, dst_dir / "scan.pdf")
+        assert os.listdir(dst_dir) == ["scan.pdf"]
+
+        source_file.write_bytes(b"second scan")
+        with pytest.raises(FileExistsError):
+            move_across_filesystems(source_file, dst_dir / "scan.pdf")
+        assert os.listdir(dst_dir) == ["scan.pdf"]
+        assert (dst_dir / "scan.pdf").read_bytes() == b"%PDF-1.7 scan data"
+
+    @pytest.mark.parametrize("error", [errno.EXDEV, errno.ENOSYS])
+    def test_copy_falls_back_when_copy_file_range_is_refused(self, source_file, tmp_path, monkeypatch, error):
+        """Test that the data is copied in userspace if copy_file_range() is not possible."""
+
+        def copy_file_range(*args):
+            raise OSError(error, os.strerror(error))
+
+        monkeypatch.setattr(os, "copy_file_range", copy_file_range, raising=False)
+        dst = tmp_path / "moved.pdf"
+
+        move_across_filesystems(source_file, dst)
+
+        assert dst.read_bytes() == b"%PDF-1.7 scan data"
+        assert not source_file.exists()
+
+
+class TestSetOwnerAndMode:
+    """Test cases for set_owner_and_mode."""
+
+    @pytest.fixture
+    def recorded_calls(self, monkeypatch):
+        """Record os.open, os.fchown and os.fchmod calls while still performing them."""
+        calls = []
+        for name in ("open", "fchown", "fchmod"):
+            original = getattr(os, name)
+
+            def record(*args, _name=name, _original=original, **kwargs):
+                calls.append(_name)
+                return _original(*args, **kwargs)
+
+            monkeypatch.setattr(os, name, record)
+        return calls
+
+    def test_matching_known_stat_makes_no_syscall(self, source_file, recorded_calls):
+        """Test that a known stat result with the wanted owner and mode skips opening and changing the file."""
+        file_stat = source_file.stat()
+
+        set_owner_and_mode(source_file, file_stat.st_uid, file_stat.st_gid, 0o640, known_stat=file_stat)
+
+        assert recorded_calls == []
+
+    def test_only_differing_attributes_are_changed(self, source_file, recorded_calls):
+        """Test that only the mode is changed if the owner already matches."""
+        file_stat = source_file.stat()
+
+        set_owner_and_mode(source_file, file_stat.st_uid, file_stat.st_gid, 0o660)
+
+        assert recorded_calls == ["open", "fchmod"]
+        assert stat.S_IMODE(source_file.stat().st_mode) == 0o660
@@ -1,63 +1,107 @@
 #!/usr/bin/env python3
 """Tests for PDF merger functionality."""
 
-import tempfile
+import fcntl
+import functools
+import io
+import os
+import sys
 from pathlib import Path
 
 import pytest
-from pypdf import PdfWriter
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
 
+import document_mover.pdf_merger as pdf_merger_module
 from document_mover.pdf_merger import PDFMerger
 
 
-@pytest.fixture
-def temp_dir():
-    """Create a temporary directory for test files."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        yield Path(tmpdir)
+@functools.cache
+def _blank_pdf_bytes(page_count: int) -> bytes:
+    """Serialize a PDF with the given number of blank pages, once per page count."""
+    writer = PdfWriter()
+    for _ in range(page_count):
+        writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
 
 
-@pytest.fixture
-def sample_pdf_page1(temp_dir):
-    """Create a simple PDF with one page."""
-    pdf_path = temp_dir / "page1.pdf"
-    writer = PdfWriter()
-    writer.add_blank_page(width=200, height=200)
-    with open(pdf_path, "wb") as f:
-        writer.write(f)
-    return pdf_path
+def _pdf_page_count(pdf_path: Path) -> int:
+    """Read the page count from the page tree root, without flattening the page tree."""
+    return PdfReader(pdf_path).trailer["/Root"]["/Pages"]["/Count"]
 
 
-@pytest.fixture
-def sample_pdf_page2(temp_dir):
-    """Create a simple PDF with one page."""
-    pdf_path = temp_dir / "page2.pdf"
-    writer = PdfWriter()
-    writer.add_blank_page(width=200, height=200)
-    with open(pdf_path, "wb") as f:
-        writer.write(f)
+@pytest.fixture(scope="session")
+def blank_pdf_bytes():
+    """Contents of a PDF with one blank page, the same bytes as the shared sample PDFs."""
+    return _blank_pdf_bytes(1)
+
+
+def _shared_blank_pdf(directory: Path, name: str, page_count: int) -> Path:
+    """
+    Write a blank sample PDF into a directory shared between pytest-xdist workers, unless present.
+
+    The first worker creates the file under a lock, the others reuse it.
+    """
+    pdf_path = directory / name
+    with open(directory / ".lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        if not pdf_path.exists():
+            tmp_path = directory / f".{name}.{os.getpid()}.tmp"
+            tmp_path.write_bytes(_blank_pdf_bytes(page_count))
+            os.replace(tmp_path, pdf_path)
+
     return pdf_path
 
 
+@pytest.fixture(scope="session")
+def sample_pdf_dir(tmp_path_factory):
+    """Directory holding the read-only sample PDFs shared by all tests."""
+    if os.environ.get("PYTEST_XDIST_WORKER") is None:
+        return tmp_path_factory.mktemp("pdfs")
+
+    # The base temporary directory of a worker is per worker, its parent is shared by the whole run
+    shared_dir = tmp_path_factory.getbasetemp().parent / "shared_pdfs"
+    shared_dir.mkdir(exist_ok=True)
+    return shared_dir
+
+
+@pytest.fixture(scope="session")
+def sample_pdf_page1(sample_pdf_dir):
+    """Create a simple PDF with one page, shared by all tests which do not modify it."""
+    return _shared_blank_pdf(sample_pdf_dir, "page1.pdf", 1)
+
+
+@pytest.fixture(scope="session")
+def sample_pdf_page2(sample_pdf_dir):
+    """Create a simple PDF with one page, shared by all tests which do not modify it."""
+    return _shared_blank_pdf(sample_pdf_dir, "page2.pdf", 1)
+
+
+@pytest.fixture(scope="session")
+def sample_pdf_multi_page(sample_pdf_dir):
+    """Create a PDF with multiple pages, shared by all tests which do not modify it."""
+    return _shared_blank_pdf(sample_pdf_dir, "multi_page.pdf", 3)
+
+
 @pytest.fixture
-def sample_pdf_multi_page(temp_dir):
-    """Create a PDF with multiple pages."""
-    pdf_path = temp_dir / "multi_page.pdf"
-    writer = PdfWriter()
-    for _ in range(3):
-        writer.add_blank_page(width=200, height=200)
-    with open(pdf_path, "wb") as f:
-        writer.write(f)
-    return pdf_path
+def merger():
+    """Create a PDF merger with default settings, per test since it caches blank page decisions."""
+    return PDFMerger()
 
 
 class TestPDFMerger:
     """Test cases for PDFMerger class."""
 
-    def test_merge_two_pdfs(self, sample_pdf_page1, sample_pdf_page2, temp_dir):
-        """Test merging two PDFs."""
-        output_path = temp_dir / "merged.pdf"
-        merger = PDFMerger()
+    @pytest.mark.parametrize("use_pymupdf", [True, False])
+    def test_merge_happy_path(self, sample_pdf_page1, sample_pdf_page2, tmp_path, use_pymupdf):
+        """Test merging two PDFs creates a complete output and keeps the sources."""
+        if use_pymupdf and not PDFMerger().use_pymupdf:
+            pytest.skip("PyMuPDF not installed")
+
+        output_path = tmp_path / "merged.pdf"
+        merger = PDFMerger(use_pymupdf=use_pymupdf)
 
         result = merger.merge(
             pdf1=sample_pdf_page1,
@@ -70,25 +114,19 @@ class TestPDFMerger:
         assert result is True
         assert output_path.exists()
         assert output_path.stat().st_size > 0
+        assert _pdf_page_count(output_path) == 2
+        assert sample_pdf_page1.exists()
+        assert sample_pdf_page2.exists()
 
-    def test_merge_creates_output_file(self, sample_pdf_page1, sample_pdf_page2, temp_dir):
-        """Test that merge creates the output file."""
-        output_path = temp_dir / "output.pdf"
-        merger = PDFMerger()
-
-        merger.merge(
-            pdf1=sample_pdf_page1,
-            pdf2=sample_pdf_page2,
-            output_path=output_path,
-            delete_source=False,
-        )
-
-        assert output_path.exists()
-
-    def test_merge_with_delete_source(self, sample_pdf_page1, sample_pdf_page2, temp_dir):
+    def test_merge_with_delete_source(self, merger, tmp_path, blank_pdf_bytes):
         """Test that source files are deleted when delete_source=True."""
-        output_path = temp_dir / "merged.pdf"
-        merger = PDFMerger()
+        output_path = tmp_path / "merged.pdf"
+
+        # The shared sample PDFs must not be deleted, use private copies
+        sample_pdf_page1 = tmp_path / "page1.pdf"
+        sample_pdf_page2 = tmp_path / "page2.pdf"
+        sample_pdf_page1.write_bytes(blank_pdf_bytes)
+        sample_pdf_page2.write_bytes(blank_pdf_bytes)
 
         # Verify source files exist
         assert sample_pdf_page1.exists()
@@ -107,28 +145,10 @@ class TestPDFMerger:
         assert not sample_pdf_page1.exists()
         assert not sample_pdf_page2.exists()
 
-    def test_merge_without_delete_source(self, sample_pdf_page1, sample_pdf_page2, temp_dir):
-        """Test that source files are kept when delete_source=False."""
-        output_path = temp_dir / "merged.pdf"
-        merger = PDFMerger()
-
-        merger.merge(
-            pdf1=sample_pdf_page1,
-            pdf2=sample_pdf_page2,
-            output_path=output_path,
-            delete_source=False,
-        )
-
-        # Verify output exists and sources are still there
-        assert output_path.exists()
-        assert sample_pdf_page1.exists()
-        assert sample_pdf_page2.exists()
-
-    def test_merge_with_non_existent_file(self, sample_pdf_page1, temp_dir):
+    def test_merge_with_non_existent_file(self, merger, sample_pdf_page1, tmp_path):
         """Test merge fails gracefully with non-existent file."""
-        non_existent = temp_dir / "non_existent.pdf"
-        output_path = temp_dir / "merged.pdf"
-        merger = PDFMerger()
+        non_existent = tmp_path / "non_existent.pdf"
+        output_path = tmp_path / "merged.pdf"
 
         result = merger.merge(
             pdf1=sample_pdf_page1,
@@ -140,28 +160,9 @@ class TestPDFMerger:
         assert result is False
         assert not output_path.exists()
 
-    def test_merge_output_file_has_content(self, sample_pdf_page1, sample_pdf_page2, temp_dir):
-        """Test that merged PDF has actual content."""
-        output_path = temp_dir / "merged.pdf"
-        merger = PDFMerger()
-
-        merger.merge(
-            pdf1=sample_pdf_page1,
-            pdf2=sample_pdf_page2,
-            output_path=output_path,
-            delete_source=False,
-        )
-
-        # Read merged PDF and verify it has content
-        from pypdf import PdfReader
-
-        reader = PdfReader(output_path)
-        assert len(reader.pages) > 0
-
-    def test_merge_multipage_pdfs(self, sample_pdf_page1, sample_pdf_multi_page, temp_dir):
+    def test_merge_multipage_pdfs(self, merger, sample_pdf_page1, sample_pdf_multi_page, tmp_path):
         """Test merging PDFs with different page counts."""
-        output_path = temp_dir / "merged.pdf"
-        merger = PDFMerger()
+        output_path = tmp_path / "merged.pdf"
 
         result = merger.merge(
             pdf1=sample_pdf_page1,
@@ -173,17 +174,35 @@ class TestPDFMerger:
         assert result is True
         assert output_path.exists()
 
-        # Verify merged PDF has pages from both sources
-        from pypdf import PdfReader
+        # Verify merged PDF has at least pages from both PDFs (1 from page1 + 3 from multi_page)
+        assert _pdf_page_count(output_path) >= 4
+
+    @pytest.mark.parametrize("use_pymupdf", [False, True])
+    def test_merge_interleaves_reversed_back_sides(self, tmp_path, use_pymupdf):
+        """Test that both backends alternate front pages with the back pages in reverse order."""
+        if use_pymupdf and not PDFMerger().use_pymupdf:
+            pytest.skip("PyMuPDF not installed")
+
+        fronts = tmp_path / "fronts.pdf"
+        backs = tmp_path / "backs.pdf"
+        for pdf_path, widths in ((fronts, (100, 110)), (backs, (200, 210))):
+            writer = PdfWriter()
+            for width in widths:
+                writer.add_blank_page(width=width, height=200)
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            pdf_path.write_bytes(buffer.getvalue())
 
+        output_path = tmp_path / "merged.pdf"
+        result = PDFMerger(use_pymupdf=use_pymupdf).merge(pdf1=fronts, pdf2=backs, output_path=output_path)
+
+        assert result is True
         reader = PdfReader(output_path)
-        # Should have at least pages from both PDFs (1 from page1 + 3 from multi_page)
-        assert len(reader.pages) >= 4
+        assert [round(float(page.mediabox.width)) for page in reader.pages] == [100, 210, 110, 200]
 
-    def test_merge_with_remove_empty_pages(self, sample_pdf_page1, sample_pdf_page2, temp_dir):
+    def test_merge_with_remove_empty_pages(self, merger, sample_pdf_page1, sample_pdf_page2, tmp_path):
         """Test merge with empty page removal."""
-        output_path = temp_dir / "merged.pdf"
-        merger = PDFMerger()
+        output_path = tmp_path / "merged.pdf"
 
         result = merger.merge(
             pdf1=sample_pdf_page1,
@@ -196,51 +215,108 @@ class TestPDFMerger:
         assert result is True
         assert output_path.exists()
 
-    def test_merge_destination_path_type(self, sample_pdf_page1, sample_pdf_page2, temp_dir):
-        """Test merge works with both string and Path object for output."""
-        # Test with Path object
-        output_path_obj = temp_dir / "merged1.pdf"
-        merger = PDFMerger()
+    def test_blank_page_decisions_are_cached_across_instances(self, sample_pdf_multi_page, tmp_path, monkeypatch):
+        """Test that a persisted blank page cache is used instead of detecting blank pages again."""
+        cache_path = tmp_path / "cache" / "blank.json"
+        assert PDFMerger(blank_cache_path=cache_path).find_blank_pages(sample_pdf_multi_page) == [True] * 3
+        assert cache_path.exists()
 
-        result1 = merger.merge(
-            pdf1=sample_pdf_page1,
-            pdf2=sample_pdf_page2,
-            output_path=output_path_obj,
-            delete_source=False,
-        )
+        def fail(page):
+            raise AssertionError("blank page detection should come from the cache")
+
+        monkeypatch.setattr(PDFMerger, "is_blank_page", staticmethod(fail))
+        monkeypatch.setattr(PDFMerger, "is_blank_pymupdf_page", staticmethod(fail))
+
+        merger = PDFMerger(blank_cache_path=cache_path)
+        assert merger.check_document_has_blank_pages(sample_pdf_multi_page) is True
 
-        assert result1 is True
-        assert output_path_obj.exists()
+    def test_pypdf_writer_is_closed_on_failure(self, sample_pdf_page1, sample_pdf_page2, tmp_path, monkeypatch):
+        """Test that the pypdf writer is closed even if writing the output fails."""
+        closed = []
 
-        # Test with string
-        output_path_str = str(temp_dir / "merged2.pdf")
-        result2 = merger.merge(
+        def fail(self, stream):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(PdfWriter, "write", fail)
+        monkeypatch.setattr(PdfWriter, "close", lambda self: closed.append(self))
+
+        result = PDFMerger(use_pymupdf=False).merge(sample_pdf_page1, sample_pdf_page2, tmp_path / "out.pdf")
+
+        assert result is False
+        assert len(closed) == 1
+
+    def test_in_memory_blank_cache_is_bounded(self, merger, monkeypatch):
+        """Test that a reused merger drops the oldest in-memory blank page decisions."""
+        monkeypatch.setattr(pdf_merger_module, "BLANK_CACHE_MAX_ENTRIES", 2)
+        for digest in ("a", "b", "c"):
+            merger.store_blank_pages(digest, [True])
+
+        assert merger.get_cached_blank_pages("a") is None
+        assert merger.get_cached_blank_pages("c") == [True]
+
+    @pytest.mark.parametrize("use_pymupdf", [True, False])
+    def test_check_then_merge_detects_blank_pages_once(
+        self, sample_pdf_multi_page, sample_pdf_page1, tmp_path, monkeypatch, use_pymupdf
+    ):
+        """Test that merging after a blank page check reuses the detected flags."""
+        if use_pymupdf and not PDFMerger().use_pymupdf:
+            pytest.skip("PyMuPDF not installed")
+
+        merger = PDFMerger(use_pymupdf=use_pymupdf)
+        calls = []
+        classify_pages = merger._classify_pages
+        monkeypatch.setattr(merger, "_classify_pages", lambda document: calls.append(1) or classify_pages(document))
+
+        assert merger.check_document_has_blank_pages(sample_pdf_multi_page) is True
+        assert merger.merge(sample_pdf_multi_page, sample_pdf_page1, tmp_path / "out.pdf", remove_empty_pages=True)
+        assert len(calls) == 2
+
+    @pytest.mark.parametrize("use_pymupdf", [True, False])
+    def test_merge_without_blank_removal_does_not_hash(
+        self, sample_pdf_page1, sample_pdf_page2, tmp_path, monkeypatch, use_pymupdf
+    ):
+        """Test that the sources are only hashed for the blank cache when blank pages are removed."""
+        if use_pymupdf and not PDFMerger().use_pymupdf:
+            pytest.skip("PyMuPDF not installed")
+
+        merger = PDFMerger(use_pymupdf=use_pymupdf)
+        hashed = []
+        source_digest = merger._source_digest
+        monkeypatch.setattr(merger, "_source_digest", lambda source: hashed.append(1) or source_digest(source))
+
+        assert merger.merge(sample_pdf_page1, sample_pdf_page2, tmp_path / "out.pdf", remove_empty_pages=False)
+        assert hashed == []
+        assert merger.merge(sample_pdf_page1, sample_pdf_page2, tmp_path / "out2.pdf", remove_empty_pages=True)
+        assert len(hashed) == 2
+
+    @pytest.mark.parametrize("as_str", [False, True])
+    def test_merge_destination_path_type(self, merger, sample_pdf_page1, sample_pdf_page2, tmp_path, as_str):
+        """Test merge works with both string and Path object for output."""
+        output_path = tmp_path / "merged.pdf"
+
+        result = merger.merge(
             pdf1=sample_pdf_page1,
             pdf2=sample_pdf_page2,
-            output_path=output_path_str,
+            output_path=str(output_path) if as_str else output_path,
             delete_source=False,
         )
 
-        assert result2 is True
-        assert Path(output_path_str).exists()
+        assert result is True
+        assert output_path.exists()
 
 
 class TestPDFMergerEdgeCases:
     """Test edge cases for PDFMerger."""
 
-    def test_merge_invalid_pdf_file(self, temp_dir):
+    def test_merge_invalid_pdf_file(self, merger, tmp_path, blank_pdf_bytes):
         """Test merge fails with invalid PDF file."""
-        invalid_pdf = temp_dir / "invalid.pdf"
+        invalid_pdf = tmp_path / "invalid.pdf"
         invalid_pdf.write_text("This is not a valid PDF")
 
-        sample_pdf = temp_dir / "sample.pdf"
-        writer = PdfWriter()
-        writer.add_blank_page(width=200, height=200)
-        with open(sample_pdf, "wb") as f:
-            writer.write(f)
+        sample_pdf = tmp_path / "sample.pdf"
+        sample_pdf.write_bytes(blank_pdf_bytes)
 
-        output_path = temp_dir / "merged.pdf"
-        merger = PDFMerger()
+        output_path = tmp_path / "merged.pdf"
 
         result = merger.merge(
             pdf1=invalid_pdf,
@@ -251,18 +327,17 @@ class TestPDFMergerEdgeCases:
 
         assert result is False
 
-    def test_merge_to_readonly_directory(self, sample_pdf_page1, sample_pdf_page2, temp_dir):
+    @pytest.mark.skipif(
+        sys.platform == "win32" or os.geteuid() == 0, reason="chmod based read-only check is not enforceable"
+    )
+    def test_merge_to_readonly_directory(self, merger, sample_pdf_page1, sample_pdf_page2, tmp_path):
         """Test merge fails when output directory is read-only."""
-        import os
-
-        readonly_dir = temp_dir / "readonly"
+        readonly_dir = tmp_path / "readonly"
         readonly_dir.mkdir()
 
         # Make directory read-only
         os.chmod(readonly_dir, 0o444)
 
-        merger = PDFMerger()
-
         try:
             result = merger.merge(
                 pdf1=sample_pdf_page1,
@@ -274,3 +349,76 @@ class TestPDFMergerEdgeCases:
         finally:
             # Restore permissions for cleanup
             os.chmod(readonly_dir, 0o755)
+
+    @pytest.mark.parametrize("use_pymupdf", [True, False])
+    def test_merge_large_source_from_file(self, sample_pdf_page1, sample_pdf_page2, tmp_path, monkeypatch, use_pymupdf):
+        """Test that sources above the in-memory limit are merged as well."""
+        if use_pymupdf and not PDFMerger().use_pymupdf:
+            pytest.skip("PyMuPDF not installed")
+
+        monkeypatch.setattr(pdf_merger_module, "IN_MEMORY_MAX_SIZE", 0)
+        output_path = tmp_path / "merged.pdf"
+
+        result = PDFMerger(use_pymupdf=use_pymupdf).merge(
+            pdf1=sample_pdf_page1, pdf2=sample_pdf_page2, output_path=output_path
+        )
+
+        assert result is True
+        assert _pdf_page_count(output_path) == 2
+
+
+def _page_with_content(content: bytes):
+    """Create a pypdf page whose content stream is the given bytes."""
+    writer = PdfWriter()
+    page = writer.add_blank_page(width=200, height=200)
+    stream = DecodedStreamObject()
+    stream.set_data(content)
+    page.replace_contents(stream)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return PdfReader(buffer).pages[0]
+
+
+class TestBlankPageDetection:
+    """Test cases for blank page detection."""
+
+    @pytest.mark.parametrize(
+        "content,expected",
+        [
+            (b"BT 10 10 Td (hi) Tj ET", False),
+            (b"BT 10 10 Td [(h) 10 (i)] TJ ET", False),
+            (b"BT 10 10 Td (hi) ' ET", False),
+            (b"10 10 100 100 re f", False),
+            (b"q 1 0 0 1 0 0 cm Q", True),
+            (b"/F gs 0 g", True),
+            (b"q BI /W 1 /H 1 /CS /G /BPC 8 ID \x00 EI Q", True),
+            (b"q BI /W 1 /H 1 /CS /G /BPC 8 ID \x00 EI 0 0 1 1 re f Q", False),
+        ],
+    )
+    def test_is_blank_page(self, content, expected):
+        """Test that text and drawing operators make a page non-blank."""
+        assert PDFMerger.is_blank_page(_page_with_content(content)) is expected
+
+    def test_large_content_stream_is_not_blank(self):
+        """Test that a content stream above the size limit counts as non-blank without scanning it."""
+        from document_mover.pdf_merger import BLANK_CONTENT_MAX_SIZE
+
+        content = b"q Q\n" * (BLANK_CONTENT_MAX_SIZE // 4 + 1)
+        assert PDFMerger.is_blank_page(_page_with_content(content)) is False
+
+    def test_xobject_makes_page_not_blank(self):
+        """Test that a referenced XObject makes a page non-blank, also with indirect resources."""
+        writer = PdfWriter()
+        page = writer.add_blank_page(width=200, height=200)
+        contents = DecodedStreamObject()
+        contents.set_data(b"q /Im0 Do Q")
+        page.replace_contents(contents)
+        image = DecodedStreamObject()
+        image.set_data(b"\x00")
+        xobjects = DictionaryObject({NameObject("/Im0"): writer._add_object(image)})
+        resources = DictionaryObject({NameObject("/XObject"): writer._add_object(xobjects)})
+        page[NameObject("/Resources")] = writer._add_object(resources)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+
+        assert PDFMerger.is_blank_page(PdfReader(buffer).pages[0]) is False